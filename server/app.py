@@ -1,38 +1,60 @@
-from functools import wraps
-import json
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, wraps
+import uuid
+import orjson
+import re
 import time
-from flask import Flask, request, jsonify
-from typing import Dict, Any
+from flask import Flask, request, jsonify, Response, stream_with_context
+from flask.json.provider import JSONProvider
+from typing import Dict, Any, Union
 import pandas as pd
+import pyarrow as pa
+from pyarrow import csv as pacsv
 import os
-from datetime import datetime
-from io import StringIO
+from datetime import datetime, timezone
 import traceback
+import fastjsonschema
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from config import API_KEY
-from huggingface_hub import InferenceClient
+from huggingface_hub import InferenceClient, configure_http_backend
 from dotenv import load_dotenv
-from supabase import create_client, Client
-import datetime
 import jwt
 from flask_cors import CORS
 from supascript import push_sustainability_data
 from supabase_client import supabase
 
 load_dotenv('.env.local')
-url: str = os.environ.get("NEXT_PUBLIC_SUPABASE_URL")
-service_role_key: str = os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
 jwt_secret: str = os.environ.get("SUPABASE_JWT_SECRET")
 
-supabase: Client = create_client(url, service_role_key)
-
 from sustainability_scoring import (
     LogisticsSustainabilityPipeline,
     SustainabilityPredictor,
-    analyze_sustainability
+    analyze_sustainability,
+    analyze_sustainability_batch
 )
 
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson.
+
+    orjson serializes dicts/lists several times faster than stdlib json and
+    understands NumPy scalars and datetimes natively, so jsonify on the large
+    batch-analysis payloads no longer dominates response time.
+    """
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(
+            obj,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+            default=str
+        ).decode()
+
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app, supports_credentials=True, origins='http://localhost:3000')
 
 @app.after_request
@@ -43,20 +65,186 @@ def after_request(response):
 pipeline = LogisticsSustainabilityPipeline()
 predictor = SustainabilityPredictor()
 
-client = InferenceClient(api_key=API_KEY)
+# Parsed uploads kept in memory, keyed by upload id, so /train can reuse
+# them without a JSON round-trip through disk.
+#
+# Both stores are in-process: gunicorn.conf.py must stay at workers=1
+# (threads provide the concurrency) or status polls and upload_id lookups
+# would land on workers that never saw the upload.
+UPLOADS: Dict[str, dict] = {}
+
+# Background upload jobs: job_id -> {'status': ..., 'result'/'error': ...}
+JOBS: Dict[str, dict] = {}
+JOB_EXECUTOR = ThreadPoolExecutor(max_workers=2)
+
+# Cap on remembered uploads/jobs; oldest entries are dropped first
+MAX_TRACKED_ENTRIES = 256
+
+def _evict_oldest(store: Dict[str, dict]):
+    """Bound an insertion-ordered store to MAX_TRACKED_ENTRIES"""
+    while len(store) > MAX_TRACKED_ENTRIES:
+        store.pop(next(iter(store)))
+
+def _pooled_session() -> requests.Session:
+    """Build a keep-alive session sized for the thread-pooled LLM calls.
+
+    Without an explicit adapter each concurrent request can open a cold
+    TCP/TLS connection; pooling keeps connections warm so batch analysis
+    does not pay a handshake per shipment.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=32,
+        pool_maxsize=64,
+        max_retries=Retry(total=3, backoff_factor=0.1)
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+# All huggingface_hub requests go through this pooled session
+configure_http_backend(backend_factory=_pooled_session)
+
+# The model and endpoint are deploy-time choices: point LLM_BASE_URL at a
+# self-hosted vLLM/TGI server with continuous batching to keep concurrent
+# requests sharing prefill/decode, or leave it unset for HF serverless
+LLM_MODEL = os.environ.get("LLM_MODEL", "meta-llama/Llama-3.2-1B-Instruct")
+LLM_BASE_URL = os.environ.get("LLM_BASE_URL")
+
+if LLM_BASE_URL:
+    client = InferenceClient(base_url=LLM_BASE_URL, api_key=API_KEY)
+else:
+    client = InferenceClient(api_key=API_KEY)
+
+# Schemas compiled once at import time; validation runs in generated code
+# and rejects malformed payloads before any scoring or LLM work is spent
+SHIPMENT_SCHEMA = {
+    "type": "object",
+    "required": ["shipment_id", "origin", "destination", "transport_mode", "packages"],
+    "properties": {
+        "shipment_id": {"type": ["string", "number"]},
+        "origin": {
+            "type": "object",
+            "required": ["lat", "long"],
+            "properties": {
+                "lat": {"type": "number"},
+                "long": {"type": "number"}
+            }
+        },
+        "destination": {
+            "type": "object",
+            "required": ["lat", "long"],
+            "properties": {
+                "lat": {"type": "number"},
+                "long": {"type": "number"}
+            }
+        },
+        "transport_mode": {"type": "string"},
+        "packages": {"type": "array", "minItems": 1}
+    }
+}
+
+BATCH_SCHEMA = {
+    "type": "object",
+    "required": ["shipments"],
+    "properties": {
+        "shipments": {
+            "type": "array",
+            "items": SHIPMENT_SCHEMA
+        }
+    }
+}
+
+_validate_shipment = fastjsonschema.compile(SHIPMENT_SCHEMA)
+_validate_batch = fastjsonschema.compile(BATCH_SCHEMA)
+
+# Metric keys in prompt order, used to build stable cache keys
+METRIC_KEYS = (
+    'package_sustainability_index',
+    'route_efficiency_score',
+    'carbon_emission_index',
+    'resource_utilization_rate',
+    'energy_efficiency_rating',
+    'waste_reduction_score'
+)
+
+# Prewritten guidance per metric, used when exactly one area is clearly weak
+WEAK_METRIC_ADVICE = {
+    'package_sustainability_index':
+        "switch to recyclable materials such as cardboard or paper and "
+        "right-size packaging so package density improves.",
+    'route_efficiency_score':
+        "review routing choices - prefer rail or sea over road and air "
+        "where transit times allow, and consolidate multi-stop routes.",
+    'carbon_emission_index':
+        "shift volume to lower-emission transport modes and consolidate "
+        "shipments to cut total tonne-kilometres.",
+    'resource_utilization_rate':
+        "consolidate shipments to fill container volume and payload "
+        "capacity before dispatching.",
+    'energy_efficiency_rating':
+        "move long-haul legs from air or truck to rail or ship, which use "
+        "a fraction of the energy per tonne-km.",
+    'waste_reduction_score':
+        "increase the share of recyclable packaging and eliminate "
+        "oversized boxes with low packing density."
+}
+
+def _rule_based_insight(metrics: Dict[str, float], overall_score: float) -> str:
+    """Return canned guidance for clear-cut metric profiles, else None.
+
+    Shipments that are uniformly strong, or weak in exactly one obvious
+    dimension, do not need a 1B-model generation to explain - a templated
+    answer covers them and the LLM is reserved for the ambiguous residual.
+    """
+    values = [metrics[key] for key in METRIC_KEYS]
+
+    if overall_score > 85 and min(values) > 70:
+        return (
+            "1. Analysis: all sustainability metrics are strong, with no "
+            "clear weak area.\n"
+            "2. Recommendations: maintain current practices; continue "
+            "consolidating shipments, favour recyclable packaging, and "
+            "monitor for regressions as volumes grow.\n"
+            "3. Impact: sustaining this profile keeps emissions and waste "
+            "near the practical minimum for these routes."
+        )
+
+    weak = [key for key in METRIC_KEYS if metrics[key] < 40]
+    if len(weak) == 1 and min(v for k, v in metrics.items() if k != weak[0]) > 60:
+        label = weak[0].replace('_', ' ')
+        return (
+            f"1. Analysis: {label} is the clear weak area "
+            f"({metrics[weak[0]]:.2f}); the remaining metrics are healthy.\n"
+            f"2. Recommendations: {WEAK_METRIC_ADVICE[weak[0]]}\n"
+            f"3. Impact: improving {label} alone would lift the overall "
+            f"score meaningfully above {overall_score:.2f}."
+        )
+
+    return None
 
 def get_llm_analysis(metrics: Dict[str, float], overall_score: float) -> str:
     """Get LLM analysis of sustainability metrics"""
-    
-    prompt = f"""Analyze the following logistics sustainability metrics and provide specific recommendations for improvement:
+    insight = _rule_based_insight(metrics, overall_score)
+    if insight is not None:
+        return insight
+
+    # The prompt formats everything with :.2f, so rounding the key to two
+    # decimals makes cache hits exact prompt matches
+    metrics_key = tuple(round(metrics[key], 2) for key in METRIC_KEYS)
+    return _cached_llm_analysis(metrics_key, round(overall_score, 2))
+
+# Prompt template built once at import time instead of re-assembling the
+# multi-line f-string on every LLM call
+ANALYSIS_PROMPT_TEMPLATE = """Analyze the following logistics sustainability metrics and provide specific recommendations for improvement:
 
 Metrics:
-- Package Sustainability Index: {metrics['package_sustainability_index']:.2f}
-- Route Efficiency Score: {metrics['route_efficiency_score']:.2f}
-- Carbon Emission Index: {metrics['carbon_emission_index']:.2f}
-- Resource Utilization Rate: {metrics['resource_utilization_rate']:.2f}
-- Energy Efficiency Rating: {metrics['energy_efficiency_rating']:.2f}
-- Waste Reduction Score: {metrics['waste_reduction_score']:.2f}
+- Package Sustainability Index: {package_sustainability_index:.2f}
+- Route Efficiency Score: {route_efficiency_score:.2f}
+- Carbon Emission Index: {carbon_emission_index:.2f}
+- Resource Utilization Rate: {resource_utilization_rate:.2f}
+- Energy Efficiency Rating: {energy_efficiency_rating:.2f}
+- Waste Reduction Score: {waste_reduction_score:.2f}
 
 Overall Sustainability Score: {overall_score:.2f}
 
@@ -66,17 +254,131 @@ Please provide:
 3. Potential environmental impact of these improvements
 """
 
+@lru_cache(maxsize=4096)
+def _cached_llm_analysis(metrics_key: tuple, overall_score: float) -> str:
+    """LRU-cached LLM call - repeated metric tuples skip the network entirely"""
+    prompt = ANALYSIS_PROMPT_TEMPLATE.format(
+        overall_score=overall_score,
+        **dict(zip(METRIC_KEYS, metrics_key))
+    )
+
     response = client.chat.completions.create(
-        model="meta-llama/Llama-3.2-1B-Instruct",
+        model=LLM_MODEL,
         messages=[
-            { "role": "user", "content": f"{prompt}" }
+            { "role": "user", "content": prompt }
         ],
-        temperature=0.7,
-        max_tokens=1024,
+        temperature=0.3,
+        max_tokens=256,
+        stop=["\n\n\n"],
     )
-    
+
     return response.choices[0].message.content
 
+# Max shipments grouped into a single LLM request
+LLM_BATCH_SIZE = 16
+
+# Shared pool for LLM dispatch; reused across requests instead of being
+# constructed and torn down inside every batch analysis
+LLM_EXECUTOR = ThreadPoolExecutor(max_workers=16)
+
+BATCH_SECTION_TEMPLATE = """Shipment "{shipment_id}":
+- Package Sustainability Index: {package_sustainability_index:.2f}
+- Route Efficiency Score: {route_efficiency_score:.2f}
+- Carbon Emission Index: {carbon_emission_index:.2f}
+- Resource Utilization Rate: {resource_utilization_rate:.2f}
+- Energy Efficiency Rating: {energy_efficiency_rating:.2f}
+- Waste Reduction Score: {waste_reduction_score:.2f}
+- Overall Sustainability Score: {overall_score:.2f}"""
+
+BATCH_PROMPT_TEMPLATE = """Analyze the following logistics sustainability metrics for each shipment and provide specific recommendations for improvement:
+
+{sections}
+
+For every shipment provide:
+1. A brief analysis of the strongest and weakest areas
+2. Three specific, actionable recommendations for improvement
+3. Potential environmental impact of these improvements
+
+Respond ONLY with a JSON array, one object per shipment, in the same order:
+[{{"shipment_id": "...", "analysis": "..."}}, ...]
+"""
+
+# Bytes per block when streaming uploaded CSVs through Arrow
+CSV_BLOCK_SIZE = 1 << 20
+
+def get_llm_analysis_batch(shipment_ids: list, metrics_list: list, overall_scores: list) -> list:
+    """Get LLM analyses for several shipments with a single chat completion.
+
+    Shipments with clear-cut metric profiles are answered by the rule engine;
+    only the residual goes to the model, grouped into one prompt so the batch
+    pays one network round-trip instead of one per shipment.
+    """
+    insights = [_rule_based_insight(metrics, overall_score)
+                for metrics, overall_score in zip(metrics_list, overall_scores)]
+
+    residual = [i for i, insight in enumerate(insights) if insight is None]
+    if not residual:
+        return insights
+
+    llm_insights = _llm_analysis_batch_call(
+        [shipment_ids[i] for i in residual],
+        [metrics_list[i] for i in residual],
+        [overall_scores[i] for i in residual]
+    )
+    for i, insight in zip(residual, llm_insights):
+        insights[i] = insight
+
+    return insights
+
+def _llm_analysis_batch_call(shipment_ids: list, metrics_list: list, overall_scores: list) -> list:
+    """One chat completion covering all given shipments, with parse fallback"""
+
+    sections = [
+        BATCH_SECTION_TEMPLATE.format(
+            shipment_id=shipment_id,
+            overall_score=overall_score,
+            **{key: metrics[key] for key in METRIC_KEYS}
+        )
+        for shipment_id, metrics, overall_score
+        in zip(shipment_ids, metrics_list, overall_scores)
+    ]
+
+    prompt = BATCH_PROMPT_TEMPLATE.format(sections="\n".join(sections))
+
+    response = client.chat.completions.create(
+        model=LLM_MODEL,
+        messages=[
+            { "role": "user", "content": prompt }
+        ],
+        temperature=0.3,
+        max_tokens=256 * len(shipment_ids),
+    )
+
+    content = response.choices[0].message.content
+
+    try:
+        parsed = orjson.loads(content)
+    except orjson.JSONDecodeError:
+        # Model sometimes wraps the array in prose - try to extract it
+        match = re.search(r'\[.*\]', content, re.DOTALL)
+        try:
+            parsed = orjson.loads(match.group(0)) if match else None
+        except orjson.JSONDecodeError:
+            parsed = None
+
+    if isinstance(parsed, list) and len(parsed) == len(shipment_ids):
+        by_id = {str(item.get('shipment_id')): item.get('analysis', '')
+                 for item in parsed if isinstance(item, dict)}
+        if len(by_id) == len(shipment_ids):
+            return [by_id.get(str(shipment_id), '') for shipment_id in shipment_ids]
+        return [item.get('analysis', '') if isinstance(item, dict) else str(item)
+                for item in parsed]
+
+    # Malformed batch response - fall back to one call per shipment
+    app.logger.warning("Batch LLM response could not be parsed, falling back to per-shipment calls")
+    return [get_llm_analysis(metrics, overall_score)
+            for metrics, overall_score in zip(metrics_list, overall_scores)]
+
 from flask import request, jsonify
 
 @app.route('/api/v1/chat', methods=['POST', 'GET'])
@@ -95,13 +397,13 @@ def chat_with_llm():
                  and sustainable practices. Use concrete metrics and specific examples when possible."""
 
         response = client.chat.completions.create(
-            model="meta-llama/Llama-3.2-1B-Instruct",
+            model=LLM_MODEL,
             messages=[
                 {"role": "system", "content": prompt},
                 {"role": "user", "content": user_message}
             ],
             temperature=0.7,
-            max_tokens=1024,
+            max_tokens=400,
         )
 
         llm_reply = response.choices[0].message.content
@@ -118,6 +420,22 @@ def chat_with_llm():
             'details': str(e)
         }), 500
 
+@lru_cache(maxsize=8192)
+def _decode_token(token: str) -> dict:
+    """Decode and verify a JWT, caching the claims for reuse.
+
+    Signature verification (HMAC + base64 decode) runs once per distinct
+    token; repeat requests with the same bearer token become a dict lookup.
+    Expiry is rechecked by the caller on every request, so a cached entry
+    cannot outlive its token.
+    """
+    return jwt.decode(
+        token,
+        jwt_secret,
+        algorithms=["HS256"],
+        audience="authenticated"
+    )
+
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
@@ -136,12 +454,9 @@ def token_required(f):
             return jsonify({'error': 'Token is missing!'}), 401
 
         try:
-            decoded = jwt.decode(
-                        token,
-                        jwt_secret,
-                        algorithms=["HS256"],
-                        audience="authenticated"
-                    )
+            decoded = _decode_token(token)
+            if decoded.get("exp", 0) <= time.time():
+                raise jwt.ExpiredSignatureError("Signature has expired")
             user_id = decoded.get("sub")
             if not user_id:
                 raise jwt.InvalidTokenError("User ID not found in token.")
@@ -154,22 +469,6 @@ def token_required(f):
 
     return decorated
 
-import csv
-import math
-
-def replace_nan(obj):
-    """
-    Recursively replace NaN values in a nested structure with None.
-    """
-    if isinstance(obj, dict):
-        return {k: replace_nan(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [replace_nan(item) for item in obj]
-    elif isinstance(obj, float):
-        return None if math.isnan(obj) else obj
-    else:
-        return obj
-
 @app.route('/api/v1/sustainability/upload', methods=['POST', 'OPTIONS'])
 @token_required
 def upload_csv(user_id):
@@ -186,10 +485,6 @@ def upload_csv(user_id):
             app.logger.error('No selected file')
             return jsonify({'error': 'No selected file'}), 400
 
-        # Read CSV file into pandas DataFrame
-        csv_content = StringIO(file.stream.read().decode("UTF-8"))
-        df = pd.read_csv(csv_content)
-
         # Validate required columns
         required_columns = [
             "shipment_id", "timestamp",
@@ -199,91 +494,119 @@ def upload_csv(user_id):
             "sustainability_score"
         ]
 
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        if missing_columns:
-            app.logger.error(f'Missing required columns: {missing_columns}')
-            return jsonify({'error': 'Missing required columns', 'missing_columns': missing_columns}), 400
+        # Stream the CSV in blocks through Arrow's multithreaded reader so
+        # peak memory is bounded by the block size, not the file size.
+        # Declaring column types up front also skips type inference.
+        try:
+            reader = pacsv.open_csv(
+                file.stream,
+                read_options=pacsv.ReadOptions(block_size=CSV_BLOCK_SIZE),
+                convert_options=pacsv.ConvertOptions(
+                    # Only the columns the pipeline consumes are materialized;
+                    # anything else in the CSV is skipped at parse time
+                    include_columns=required_columns,
+                    column_types={
+                        "shipment_id": pa.string(),
+                        "transport_mode": pa.string(),
+                        "origin_lat": pa.float64(),
+                        "origin_long": pa.float64(),
+                        "destination_lat": pa.float64(),
+                        "destination_long": pa.float64(),
+                        "sustainability_score": pa.float64()
+                    }
+                )
+            )
+        except pa.ArrowKeyError as e:
+            app.logger.error(f'Missing required columns: {str(e)}')
+            return jsonify({'error': 'Missing required columns', 'details': str(e)}), 400
 
-        # Convert DataFrame to required format
         shipments = []
         sustainability_scores = []
-
-        for index, row in df.iterrows():
-            try:
-                # Parse packages field from JSON string to list
-                if isinstance(row["packages"], str):
-                    packages = json.loads(row["packages"])
-                elif isinstance(row["packages"], list):
-                    packages = row["packages"]
-                else:
-                    raise ValueError("Invalid format for packages field")
-
-                shipment = {
-                    "shipment_id": row["shipment_id"],
-                    "timestamp": row["timestamp"],
-                    "origin": {
-                        "lat": row["origin_lat"],
-                        "long": row["origin_long"]
-                    },
-                    "destination": {
-                        "lat": row["destination_lat"],
-                        "long": row["destination_long"]
-                    },
-                    "transport_mode": row["transport_mode"],
-                    "packages": packages
-                }
-                shipments.append(shipment)
-                sustainability_scores.append(row["sustainability_score"])
-            except (ValueError, json.JSONDecodeError) as e:
-                app.logger.error(f"Row parsing error at index {index}: {str(e)}")
-                return jsonify({'error': 'Invalid data format in CSV', 'row_index': index}), 400
-
-        data = {
-            "shipments": shipments,
-            "sustainability_scores": sustainability_scores
+        row_offset = 0
+
+        for batch in reader:
+            df = batch.to_pandas()
+            if row_offset == 0:
+                missing_columns = [col for col in required_columns if col not in df.columns]
+                if missing_columns:
+                    app.logger.error(f'Missing required columns: {missing_columns}')
+                    return jsonify({'error': 'Missing required columns', 'missing_columns': missing_columns}), 400
+
+            # Scrub NaNs once at the source in C instead of walking the
+            # response payload recursively in Python afterwards
+            df = df.astype(object).where(pd.notna(df), None)
+
+            # Convert the chunk using column-wise access instead of the
+            # per-row iterrows() slow path
+            packages_list = []
+            for index, value in enumerate(df["packages"].tolist()):
+                try:
+                    # Parse packages field from JSON string to list
+                    if isinstance(value, str):
+                        packages_list.append(orjson.loads(value))
+                    elif isinstance(value, list):
+                        packages_list.append(value)
+                    else:
+                        raise ValueError("Invalid format for packages field")
+                except (ValueError, orjson.JSONDecodeError) as e:
+                    app.logger.error(f"Row parsing error at index {row_offset + index}: {str(e)}")
+                    return jsonify({'error': 'Invalid data format in CSV', 'row_index': row_offset + index}), 400
+
+            origins = df[["origin_lat", "origin_long"]] \
+                .rename(columns={"origin_lat": "lat", "origin_long": "long"}) \
+                .to_dict(orient="records")
+            destinations = df[["destination_lat", "destination_long"]] \
+                .rename(columns={"destination_lat": "lat", "destination_long": "long"}) \
+                .to_dict(orient="records")
+            base_fields = df[["shipment_id", "timestamp", "transport_mode"]].to_dict(orient="records")
+
+            shipments.extend(
+                {**base, "origin": origin, "destination": destination, "packages": packages}
+                for base, origin, destination, packages
+                in zip(base_fields, origins, destinations, packages_list)
+            )
+            sustainability_scores.extend(df["sustainability_score"].tolist())
+            row_offset += len(df)
+
+        # Keep the parsed upload for later /train calls
+        upload_id = uuid.uuid4().hex
+        UPLOADS[upload_id] = {
+            "data": {
+                "shipments": shipments,
+                "sustainability_scores": sustainability_scores
+            }
         }
+        _evict_oldest(UPLOADS)
+
+        # With ?background=true the client gets a 202 and a job id right
+        # after parsing; training, analysis and the Supabase push run on the
+        # job executor instead of holding the request open for the LLM stage
+        if request.args.get('background') == 'true':
+            job_id = uuid.uuid4().hex
+            JOBS[job_id] = {'status': 'pending', 'user_id': user_id}
+            _evict_oldest(JOBS)
+            JOB_EXECUTOR.submit(
+                _run_upload_job, job_id,
+                shipments, sustainability_scores, user_id, upload_id
+            )
+            return jsonify({
+                'job_id': job_id,
+                'upload_id': upload_id,
+                'status': 'pending'
+            }), 202
 
-        # Train the model
-        train_result = train_model()
-
-        if isinstance(train_result, tuple):
-            response_data, status_code = train_result
-            if status_code != 200:
-                return jsonify({
-                    'error': 'Training failed',
-                    'details': str(response_data)
-                }), status_code
-
-            if hasattr(response_data, 'get_json'):
-                response_data = response_data.get_json()
-
-            batch_analysis_result = perform_batch_analysis({"shipments": shipments})
-            if isinstance(batch_analysis_result, tuple):
-                return batch_analysis_result  # Error response
-            else:
-                # Prepare the response data
-                response_payload = {
-                    "batch_analysis": batch_analysis_result
-                }
-
-                # Replace NaN values with None
-                safe_response = replace_nan(response_payload)
-
-                # Push the entire JSON payload to Supabase
-                try:
-                    push_sustainability_data(safe_response, user_id)
-                except Exception as e:
-                    app.logger.error(f"Error pushing data to Supabase: {str(e)}")
-                    return jsonify({
-                        'error': 'Failed to push data to Supabase',
-                        'details': str(e)
-                    }), 500
-
-                # Return the safe_response as JSON
-                return jsonify(safe_response), 200
-        else:
-            app.logger.error(f"Invalid train_result type: {type(train_result)}")
-            return jsonify({'error': 'Invalid response from training model'}), 500
+        try:
+            response_payload = _process_upload(
+                shipments, sustainability_scores, user_id, upload_id
+            )
+        except ValueError as e:
+            app.logger.error(f"Training error: {str(e)}")
+            return jsonify({
+                'error': 'Training failed',
+                'details': str(e)
+            }), 400
+
+        return jsonify(response_payload), 200
 
     except KeyError as e:
         # Specific handling for KeyError
@@ -297,24 +620,65 @@ def upload_csv(user_id):
         response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
         return response
 
+def _process_upload(shipments, sustainability_scores, user_id, upload_id):
+    """Train, analyze and push one parsed upload; returns the response payload"""
+    _train_impl(shipments, sustainability_scores)
+
+    batch_analysis_result = perform_batch_analysis({"shipments": shipments})
+
+    response_payload = {
+        "upload_id": upload_id,
+        "batch_analysis": batch_analysis_result
+    }
+
+    # Push the entire JSON payload to Supabase; any NaNs left in the
+    # analysis outputs are serialized as null by orjson
+    push_sustainability_data(response_payload, user_id)
+
+    return response_payload
+
+def _run_upload_job(job_id, shipments, sustainability_scores, user_id, upload_id):
+    """Executor wrapper that records job progress in JOBS"""
+    JOBS[job_id] = {'status': 'running', 'user_id': user_id}
+    try:
+        result = _process_upload(shipments, sustainability_scores, user_id, upload_id)
+        JOBS[job_id] = {'status': 'finished', 'user_id': user_id, 'result': result}
+    except Exception as e:
+        app.logger.error(f"Upload job {job_id} failed: {str(e)}")
+        JOBS[job_id] = {'status': 'failed', 'user_id': user_id, 'error': str(e)}
+
+@app.route('/api/v1/sustainability/upload/status/<job_id>', methods=['GET', 'OPTIONS'])
+@token_required
+def upload_status(user_id, job_id):
+    """Poll the state of a background upload job"""
+    job = JOBS.get(job_id)
+    # Treat another user's job the same as a missing one so job ids
+    # can't be used to read someone else's batch-analysis result
+    if job is None or job.get('user_id') != user_id:
+        return jsonify({'error': 'Unknown job_id'}), 404
+    return jsonify({k: v for k, v in job.items() if k != 'user_id'}), 200
+
 @app.route('/api/v1/sustainability/analyze', methods=['POST'])
 def analyze_shipment():
     """Analyze shipment sustainability with LLM-enhanced insights"""
     try:
         data = request.get_json()
 
-        # Add timestamp if not present
-        if 'timestamp' not in data:
-            data['timestamp'] = datetime.datetime.now().isoformat()
-        
-        # Validate required fields
-        required_fields = ['shipment_id', 'origin', 'destination', 'transport_mode', 'packages']
-        if not all(field in data for field in required_fields):
+        # One timestamp per request, reused in the payload and the response
+        now = datetime.now().isoformat()
+        data.setdefault('timestamp', now)
+
+
+        # Validate structure before any scoring or LLM work
+        try:
+            _validate_shipment(data)
+        except fastjsonschema.JsonSchemaException as e:
             return jsonify({
-                'error': 'Missing required fields',
-                'required_fields': required_fields
+                'error': f'Invalid shipment data: {e.message}',
+                'required_fields': SHIPMENT_SCHEMA['required']
             }), 400
-            
+
+
         # Perform sustainability analysis
         analysis_results = analyze_sustainability(pipeline, data, predictor)
         
@@ -326,7 +690,7 @@ def analyze_shipment():
         
         # Combine results
         response = {
-            'timestamp': datetime.datetime.now().isoformat(),
+            'timestamp': now,
             'shipment_id': data['shipment_id'],
             'sustainability_analysis': analysis_results,
             'llm_insights': llm_insights,
@@ -340,25 +704,45 @@ def analyze_shipment():
             'error_type': type(e).__name__
         }), 500
 
+def _train_impl(shipments, sustainability_scores):
+    """Train the predictor on in-memory shipments and scores"""
+    if len(shipments) == 0:
+        raise ValueError('No historical data found for training')
+
+    app.logger.info(f"Training model with {len(shipments)} shipments")
+    return predictor.train(shipments, sustainability_scores)
+
 @app.route('/api/v1/sustainability/train', methods=['POST'])
 def train_model():
-    """Train the sustainability predictor with historical data"""
+    """Train the sustainability predictor with historical data.
+
+    Trains from the request body when one is provided; otherwise falls back
+    to the uploaded_data.json file left by a previous upload.
+    """
     try:
-        upload_dir = os.getenv('UPLOAD_DIR', '/tmp/uploads')
-        json_file_path = os.path.join(upload_dir, 'uploaded_data.json')
-        
-        if not os.path.exists(upload_dir):
-            os.makedirs(upload_dir)
-            
-        if not os.path.exists(json_file_path):
-            app.logger.error(f"File not found: {json_file_path}")
-            return jsonify({'error': 'No uploaded data found for training'}), 404
-        
-        with open(json_file_path, 'r') as json_file:
-            historical_data = json.load(json_file)
-        
-        app.logger.info(f"Loaded data: {json.dumps(historical_data)[:200]}...")
-        
+        historical_data = request.get_json(silent=True)
+
+        if historical_data and 'upload_id' in historical_data:
+            historical_data = UPLOADS.get(historical_data['upload_id'])
+            if historical_data is None:
+                return jsonify({'error': 'Unknown upload_id'}), 404
+
+        if historical_data is None:
+            upload_dir = os.getenv('UPLOAD_DIR', '/tmp/uploads')
+            json_file_path = os.path.join(upload_dir, 'uploaded_data.json')
+
+            if not os.path.exists(upload_dir):
+                os.makedirs(upload_dir)
+
+            if not os.path.exists(json_file_path):
+                app.logger.error(f"File not found: {json_file_path}")
+                return jsonify({'error': 'No uploaded data found for training'}), 404
+
+            with open(json_file_path, 'rb') as json_file:
+                historical_data = orjson.loads(json_file.read())
+
+            app.logger.info(f"Loaded data: {orjson.dumps(historical_data)[:200]}...")
+
         if not historical_data.get('data') or \
            not historical_data['data'].get('shipments') or \
            not historical_data['data'].get('sustainability_scores'):
@@ -367,25 +751,21 @@ def train_model():
                 'error': 'Missing required training data',
                 'required_fields': ['data.shipments', 'data.sustainability_scores']
             }), 400
-        
-        shipments = historical_data['data']['shipments']
-        sustainability_scores = historical_data['data']['sustainability_scores']
 
-        if len(shipments) == 0:
-            app.logger.error("No shipments found")
-            return jsonify({'error': 'No historical data found for training'}), 404 
-        
-        app.logger.info(f"Training model with {len(shipments)} shipments")
-        training_results = predictor.train(
-            shipments,
-            sustainability_scores
-        )
-        
+        try:
+            training_results = _train_impl(
+                historical_data['data']['shipments'],
+                historical_data['data']['sustainability_scores']
+            )
+        except ValueError as e:
+            app.logger.error(str(e))
+            return jsonify({'error': str(e)}), 404
+
         return jsonify({
             'message': 'Model trained successfully',
             'training_results': training_results
         }), 200
-        
+
     except Exception as e:
         app.logger.error(f"Training error: {str(e)}")
         return jsonify({
@@ -393,6 +773,29 @@ def train_model():
             'error_type': type(e).__name__
         }), 500
 
+def _stream_batch_response(result):
+    """Stream the batch payload one result record at a time.
+
+    Serializing per record keeps peak memory at one record instead of the
+    full multi-MB response and lets clients start parsing immediately.
+    """
+    def generate():
+        yield (b'{"timestamp":' + orjson.dumps(result['timestamp'])
+               + b',"num_shipments_analyzed":'
+               + orjson.dumps(result['num_shipments_analyzed'])
+               + b',"results":[')
+        for i, record in enumerate(result['results']):
+            if i:
+                yield b','
+            yield orjson.dumps(
+                record,
+                option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+                default=str
+            )
+        yield b']}'
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
 @app.route('/api/v1/sustainability/batch-analyze', methods=['POST'])
 def batch_analyze():
     """Analyze multiple shipments in batch"""
@@ -402,7 +805,7 @@ def batch_analyze():
         if isinstance(result, tuple):
             return result  # Error response
         else:
-            return jsonify(result)
+            return _stream_batch_response(result)
     except Exception as e:
         return jsonify({
             'error': str(e),
@@ -411,28 +814,68 @@ def batch_analyze():
     
 def perform_batch_analysis(data):
     """Perform batch analysis on shipments data"""
-    if 'shipments' not in data:
-        raise ValueError("Input data must contain 'shipments' key.")
-
-    results = []
-    for shipment in data['shipments']:
-        analysis = analyze_sustainability(pipeline, shipment, predictor)
-        llm_insights = get_llm_analysis(
-            analysis['metrics'],
-            analysis['overall_sustainability_score']
+    try:
+        _validate_batch(data)
+    except fastjsonschema.JsonSchemaException as e:
+        raise ValueError(f"Invalid batch data: {e.message}")
+
+    shipments = data['shipments']
+
+    # Scoring is CPU-bound and fast, run it up front as one vectorized pass
+    # over every shipment so each analysis echoes its own shipment's IDs
+    analyses = analyze_sustainability_batch(pipeline, shipments, predictor)
+
+    # CSVs often repeat the same shipment profile under different IDs.
+    # Key each shipment on its canonicalized JSON (minus the ID) and run the
+    # expensive LLM-insight stage once per distinct profile, fanning the
+    # insights back out afterwards.
+    memo = {}
+    unique_idx = []
+    insight_slots = []
+    for i, shipment in enumerate(shipments):
+        key = orjson.dumps(
+            {k: v for k, v in shipment.items() if k != 'shipment_id'},
+            option=orjson.OPT_SORT_KEYS,
+            default=str
         )
-
-        results.append({
+        if key not in memo:
+            memo[key] = len(unique_idx)
+            unique_idx.append(i)
+        insight_slots.append(memo[key])
+
+    # Group shipments into batched LLM requests so each chunk pays a single
+    # network round-trip, and issue the chunks concurrently
+    unique_ids = [shipments[i]['shipment_id'] for i in unique_idx]
+    chunks = [slice(start, start + LLM_BATCH_SIZE)
+              for start in range(0, len(unique_idx), LLM_BATCH_SIZE)]
+
+    chunk_insights = list(LLM_EXECUTOR.map(
+        lambda chunk: get_llm_analysis_batch(
+            unique_ids[chunk],
+            [analyses[i]['metrics'] for i in unique_idx[chunk]],
+            [analyses[i]['overall_sustainability_score'] for i in unique_idx[chunk]]
+        ),
+        chunks
+    ))
+    unique_insights = [insight for chunk in chunk_insights for insight in chunk]
+    insights = [unique_insights[slot] for slot in insight_slots]
+
+    results = [
+        {
             'shipment_id': shipment['shipment_id'],
             'sustainability_analysis': analysis,
             'llm_insights': llm_insights
-        })
+        }
+        for shipment, analysis, llm_insights in zip(shipments, analyses, insights)
+    ]
 
     return {
-        'timestamp': datetime.datetime.utcnow().isoformat(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
         'num_shipments_analyzed': len(results),
         'results': results
     }
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    # Local development only - production runs under gunicorn
+    # (gunicorn -c gunicorn.conf.py app:app)
+    app.run(debug=os.environ.get('FLASK_DEBUG') == '1', host='0.0.0.0', port=5000)
\ No newline at end of file
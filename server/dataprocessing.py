@@ -1,16 +1,152 @@
 from dataclasses import Field
+import atexit
+import math
+import os
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Optional, Protocol, Tuple, Union
 from datetime import datetime
+from functools import lru_cache
 from pydantic import BaseModel, validator
+from sklearn.metrics.pairwise import haversine_distances
 import logging
 from concurrent.futures import ThreadPoolExecutor
-from abc import ABC, abstractmethod
+
+try:
+    from numba import njit, prange
+    _HAS_NUMBA = True
+except ImportError:
+    # numba is an optional accelerator - without it the kernels below run
+    # as plain NumPy/Python, just without JIT compilation
+    _HAS_NUMBA = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        def wrap(func):
+            return func
+        return wrap
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Shared enrichment pool: spawning a fresh ThreadPoolExecutor per shipment
+# costs thread creation/teardown syscalls on every request, so all pipeline
+# instances reuse one long-lived, bounded pool instead
+_ENRICH_POOL = ThreadPoolExecutor(
+    max_workers=min(8, (os.cpu_count() or 1) * 2),
+    thread_name_prefix="enrich"
+)
+atexit.register(_ENRICH_POOL.shutdown)
+
+EARTH_RADIUS_KM = 6371
+
+
+@njit(cache=True, fastmath=True)
+def _haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Scalar haversine distance in km using math-module transcendentals.
+
+    On single lat/long pairs math.sin/cos/asin are roughly an order of
+    magnitude cheaper than the equivalent NumPy ufuncs, and numba (when
+    installed) lowers them further to native LLVM intrinsics.
+    """
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = math.radians(lat2 - lat1)
+    dlam = math.radians(lon2 - lon1)
+
+    a = math.sin(dphi * 0.5) ** 2 + \
+        math.cos(phi1) * math.cos(phi2) * math.sin(dlam * 0.5) ** 2
+    return EARTH_RADIUS_KM * 2 * math.asin(math.sqrt(a))
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _haversine_batch_nb(lat1, lon1, lat2, lon2, out):
+    # Fused single-pass haversine: one output buffer, no trig temporaries
+    for i in prange(out.shape[0]):
+        phi1 = math.radians(lat1[i])
+        phi2 = math.radians(lat2[i])
+        dphi = math.radians(lat2[i] - lat1[i])
+        dlam = math.radians(lon2[i] - lon1[i])
+        a = math.sin(dphi * 0.5) ** 2 + \
+            math.cos(phi1) * math.cos(phi2) * math.sin(dlam * 0.5) ** 2
+        out[i] = EARTH_RADIUS_KM * 2 * math.asin(math.sqrt(a))
+
+
+# Below this row count the NumPy expression wins; jit dispatch and thread
+# fan-out only pay off on large batches
+_NUMBA_BATCH_THRESHOLD = 1024
+
+
+def _distance_fast_km(origin: Dict[str, float], destination: Dict[str, float]) -> float:
+    """Equirectangular distance approximation in km.
+
+    Accurate to well under 1% over continental distances and needs only
+    one cos and one sqrt - enough for threshold gates where the exact
+    haversine value is overkill.
+    """
+    phi1 = math.radians(origin['lat'])
+    phi2 = math.radians(destination['lat'])
+    dlam = math.radians(destination['long'] - origin['long'])
+    x = dlam * math.cos((phi1 + phi2) * 0.5)
+    y = phi2 - phi1
+    return EARTH_RADIUS_KM * math.sqrt(x * x + y * y)
+
+
+@lru_cache(maxsize=8192)
+def _haversine_cached(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Memoized haversine over lat/long quantized to 4 decimals (~11 m).
+
+    Warehouse-to-city pairs repeat constantly across shipments, so cache
+    hits skip the trig chain entirely.
+    """
+    return _haversine(lat1, lon1, lat2, lon2)
+
+
+def haversine_vector(origins: np.ndarray, destinations: np.ndarray) -> np.ndarray:
+    """Vectorized haversine distance for (N, 2) arrays of [lat, long] pairs.
+
+    One call over N shipments replaces N scalar trig chains, so the ufunc
+    dispatch overhead is paid once per batch instead of once per row.
+    Float inputs keep their precision (float32 batches stay float32,
+    halving memory bandwidth); anything else is promoted to float64.
+    """
+    origins = np.asarray(origins)
+    destinations = np.asarray(destinations)
+    if origins.dtype.kind != 'f':
+        origins = origins.astype(np.float64)
+    if destinations.dtype.kind != 'f':
+        destinations = destinations.astype(np.float64)
+
+    if _HAS_NUMBA and origins.ndim == 2 and origins.shape[0] >= _NUMBA_BATCH_THRESHOLD:
+        out = np.empty(origins.shape[0], dtype=origins.dtype)
+        _haversine_batch_nb(origins[:, 0], origins[:, 1],
+                            destinations[:, 0], destinations[:, 1], out)
+        return out
+
+    phi1 = np.radians(origins[..., 0])
+    phi2 = np.radians(destinations[..., 0])
+    dphi = phi2 - phi1
+    dlam = np.radians(destinations[..., 1] - origins[..., 1])
+
+    a = np.sin(dphi * 0.5) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlam * 0.5) ** 2
+    return EARTH_RADIUS_KM * 2 * np.arcsin(np.sqrt(a))
+
+
+def distance_matrix_km(origins: np.ndarray, destinations: np.ndarray) -> np.ndarray:
+    """Pairwise (N, M) haversine distance matrix in km.
+
+    Delegates to scikit-learn's compiled haversine_distances for the
+    all-pairs case (fleet reports, clustering) rather than broadcasting
+    the hand-rolled kernel, which would allocate N*M intermediates per
+    trig step.
+    """
+    origins_rad = np.radians(np.asarray(origins, dtype=np.float64))
+    destinations_rad = np.radians(np.asarray(destinations, dtype=np.float64))
+    return haversine_distances(origins_rad, destinations_rad) * EARTH_RADIUS_KM
+
+
 class PackageData(BaseModel):
     package_id: str
     material_type: str
@@ -32,24 +168,114 @@ class ShipmentData(BaseModel):
     packages: List[PackageData]
     timestamp: Optional[datetime]
 
-class DataProcessor(ABC):
-    @abstractmethod
+# Fields every shipment dict must carry; checked directly instead of
+# instantiating ShipmentData, whose per-field coercion the hot path
+# discards anyway
+_REQUIRED_FIELDS = ('shipment_id', 'origin', 'destination', 'transport_mode', 'packages')
+
+# Columns a shipment DataFrame must carry
+_REQUIRED_COLUMNS = frozenset({'shipment_id', 'origin', 'destination', 'transport_mode'})
+
+# kg CO2 per km by transport mode; built once instead of per call
+_EMISSIONS_KG_PER_KM = {
+    'truck': 0.1,
+    'train': 0.04,
+    'ship': 0.02,
+    'air': 0.5
+}
+
+# Energy intensity (MJ/tonne-km) by transport mode, with the min/max
+# bounds precomputed instead of rescanned per shipment
+_ENERGY_FACTORS_MJ_PER_TKM = {
+    'truck': 2.5,
+    'train': 0.6,
+    'ship': 0.2,
+    'air': 8.0
+}
+_ENERGY_FACTOR_MIN = min(_ENERGY_FACTORS_MJ_PER_TKM.values())
+_ENERGY_FACTOR_MAX = max(_ENERGY_FACTORS_MJ_PER_TKM.values())
+
+# distance * weight cancels out of the efficiency ratio, so the score is a
+# pure function of transport mode - precompute all four at import
+_ENERGY_SCORES = {
+    mode: round(
+        (1 - (factor - _ENERGY_FACTOR_MIN) / (_ENERGY_FACTOR_MAX - _ENERGY_FACTOR_MIN)) * 100, 2
+    )
+    for mode, factor in _ENERGY_FACTORS_MJ_PER_TKM.items()
+}
+
+# Month number -> season, indexable directly by timestamp.month
+_MONTH_TO_SEASON = (
+    None,
+    'winter', 'winter',             # Jan, Feb
+    'spring', 'spring', 'spring',   # Mar-May
+    'summer', 'summer', 'summer',   # Jun-Aug
+    'fall', 'fall', 'fall',         # Sep-Nov
+    'winter'                        # Dec
+)
+
+# Example seasonal patterns (would be based on historical data in production)
+_SEASONAL_IMPACTS = {
+    'winter': [
+        {'factor': 'weather_delays', 'impact': 'high'},
+        {'factor': 'energy_consumption', 'impact': 'high'},
+        {'factor': 'route_restrictions', 'impact': 'medium'}
+    ],
+    'summer': [
+        {'factor': 'cooling_requirements', 'impact': 'high'},
+        {'factor': 'traffic_congestion', 'impact': 'medium'},
+        {'factor': 'delivery_windows', 'impact': 'low'}
+    ],
+    'spring': [
+        {'factor': 'route_flexibility', 'impact': 'high'},
+        {'factor': 'energy_consumption', 'impact': 'medium'},
+        {'factor': 'delivery_efficiency', 'impact': 'high'}
+    ],
+    'fall': [
+        {'factor': 'weather_variability', 'impact': 'medium'},
+        {'factor': 'route_optimization', 'impact': 'high'},
+        {'factor': 'delivery_volume', 'impact': 'medium'}
+    ]
+}
+
+# Recycling rate by packaging material
+_MATERIAL_RECYCLING_RATES = {
+    'cardboard': 0.85,
+    'paper': 0.80,
+    'plastic': 0.30,
+    'metal': 0.90,
+    'glass': 0.75,
+    'wood': 0.60
+}
+
+
+class DataProcessor(Protocol):
+    """Structural interface for pipeline processors.
+
+    A Protocol instead of an ABC: anything with process/validate methods
+    qualifies, and no ABCMeta machinery runs at class creation or
+    isinstance checks.
+    """
+
     def process(self, data: Union[dict, pd.DataFrame]):
-        pass
+        ...
 
-    @abstractmethod
     def validate(self, data: Union[dict, pd.DataFrame]) -> bool:
-        pass
+        ...
 
 # Data Processing Pipeline
 class LogisticsSustainabilityPipeline:
     def __init__(self):
-        self.processors: List[DataProcessor] = []
+        # (validate, process, name) per processor, pre-bound in
+        # add_processor so the dispatch loop skips attribute lookups
+        self.processors: List[Tuple[callable, callable, str]] = []
         self.error_handlers: Dict[str, callable] = {}
         self.enrichment_sources: Dict[str, callable] = {}
 
     def add_processor(self, processor: DataProcessor):
-        self.processors.append(processor)
+        self.processors.append(
+            (processor.validate, processor.process, type(processor).__name__)
+        )
 
     def add_error_handler(self, error_type: str, handler: callable):
         self.error_handlers[error_type] = handler
@@ -70,7 +296,14 @@ class LogisticsSustainabilityPipeline:
             
             # 4. Generate Analytics
             analytics_results =  self._generate_analytics(processed_data)
-            
+
+            # Drop the per-run memo keys (_distance_km, _pkg_arrays) so
+            # internal cache state never leaks into API responses or the
+            # rows pushed to Supabase
+            if isinstance(processed_data, dict):
+                processed_data = {k: v for k, v in processed_data.items()
+                                  if not k.startswith('_')}
+
             return {
                 'status': 'success',
                 'processed_data': processed_data,
@@ -81,58 +314,105 @@ class LogisticsSustainabilityPipeline:
             logger.error(f"Error in processing pipeline: {str(e)}")
             return {'status': 'error', 'message': str(e)}
 
+    def process_batch(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Columnar batch scoring for DataFrame workloads.
+
+        Stays vectorized end-to-end - one haversine pass over all rows,
+        an emissions lookup via Series.map and an array comparison for
+        the route gate - instead of looping process_data per row.
+        """
+        self._validate_dataframe(df)
+
+        # float32 is ample for CO2 estimates (emission factors carry two
+        # significant figures) and halves the batch's memory traffic
+        origins = np.array([[o['lat'], o['long']] for o in df['origin']], dtype=np.float32)
+        destinations = np.array([[d['lat'], d['long']] for d in df['destination']], dtype=np.float32)
+        distances = haversine_vector(origins, destinations).astype(np.float64)
+
+        result = df.copy()
+        result['distance_km'] = distances
+        result['carbon_footprint'] = distances * \
+            df['transport_mode'].map(_EMISSIONS_KG_PER_KM).fillna(0.1).to_numpy()
+        result['optimize_route'] = distances > 500
+        return result
+
     def _validate_data(self, data: Union[dict, pd.DataFrame]) -> Union[dict, pd.DataFrame]:
         """Validate incoming data structure and content"""
         try:
             if isinstance(data, dict):
-                ShipmentData(**data)
+                for field in _REQUIRED_FIELDS:
+                    if field not in data:
+                        raise ValueError(f"Missing required field: {field}")
             elif isinstance(data, pd.DataFrame):
-                # Validate required columns
-                required_columns = {'shipment_id', 'origin', 'destination', 'transport_mode'}
-                if not required_columns.issubset(data.columns):
-                    raise ValueError(f"Missing required columns: {required_columns - set(data.columns)}")
+                self._validate_dataframe(data)
             return data
         except Exception as e:
             if type(e).__name__ in self.error_handlers:
                 return self.error_handlers[type(e).__name__](e, data)
             raise
 
+    def _validate_dataframe(self, df: pd.DataFrame) -> None:
+        """Columnar validation of a shipment DataFrame.
+
+        Checks run as one C-level pass per column (set ops on the column
+        index, vectorized isna reductions) rather than per-row Python
+        callbacks, which fall over on large frames.
+        """
+        missing = [col for col in _REQUIRED_COLUMNS if col not in df.columns]
+        if missing:
+            raise ValueError(f"Missing required columns: {set(missing)}")
+
+        # Column-level dtype check, once per frame rather than per row:
+        # transport_mode must hold strings, not numerics
+        if pd.api.types.is_numeric_dtype(df['transport_mode']):
+            raise ValueError("Column 'transport_mode' must contain strings")
+
+        null_columns = [col for col in _REQUIRED_COLUMNS if df[col].isna().any()]
+        if null_columns:
+            raise ValueError(f"Null values in required columns: {sorted(null_columns)}")
+
     def _enrich_data(self, data: Union[dict, pd.DataFrame]) -> Dict:
         """Enrich data with additional information from various sources"""
-        enriched_data = data.copy() if isinstance(data, dict) else data.to_dict('records')[0]
+        # iloc[0].to_dict() grabs just the first row; to_dict('records')
+        # would materialize every row only to discard all but one.
+        # {**data} shallow-copies the outer dict without the .copy()
+        # method-call overhead; enrichment only adds top-level keys
+        enriched_data = {**data} if isinstance(data, dict) else data.iloc[0].to_dict()
         
-        # Parallel enrichment processing
-        with ThreadPoolExecutor() as executor:
-            enrichment_futures = {
-                source_name: executor.submit(source_callable, enriched_data)
-                for source_name, source_callable in self.enrichment_sources.items()
-            }
-            
-            # Collect results
-            for source_name, future in enrichment_futures.items():
-                try:
-                    enriched_data[source_name] = future.result()
-                except Exception as e:
-                    logger.error(f"Error enriching data from {source_name}: {str(e)}")
-                    
+        # Parallel enrichment processing on the shared module-level pool
+        enrichment_futures = {
+            source_name: _ENRICH_POOL.submit(source_callable, enriched_data)
+            for source_name, source_callable in self.enrichment_sources.items()
+        }
+
+        # Collect results
+        for source_name, future in enrichment_futures.items():
+            try:
+                enriched_data[source_name] = future.result()
+            except Exception as e:
+                logger.error(f"Error enriching data from {source_name}: {str(e)}")
+
         return enriched_data
 
     def _run_processors(self, data: Dict) -> Dict:
         """Run data through all processors in sequence"""
         processed_data = data
-        for processor in self.processors:
-            if processor.validate(processed_data):
-                processed_data = processor.process(processed_data)
+        for validate, process, name in self.processors:
+            if validate(processed_data):
+                processed_data = process(processed_data)
             else:
-                logger.warning(f"Data validation failed for processor: {processor.__class__.__name__}")
+                logger.warning(f"Data validation failed for processor: {name}")
         return processed_data
 
     def _generate_analytics(self, data: Dict) -> Dict:
         """Generate analytics from processed data"""
+        # Compute the metrics once and hand them to the trend analysis,
+        # which previously recomputed the full set a second time
+        metrics = self._calculate_sustainability_metrics(data)
         return {
-            'sustainability_metrics': self._calculate_sustainability_metrics(data),
+            'sustainability_metrics': metrics,
             'optimization_opportunities': self._identify_optimization_opportunities(data),
-            'trend_analysis': self._analyze_trends(data)
+            'trend_analysis': self._analyze_trends(data, metrics)
         }
 
     def _calculate_sustainability_metrics(self, data: Dict) -> Dict:
@@ -144,17 +424,35 @@ class LogisticsSustainabilityPipeline:
             'energy_efficiency': self._calculate_energy_efficiency(data)
         }
 
+    def _package_arrays(self, data: Dict):
+        """Extract package columns once per shipment and memoize on the dict.
+
+        Several metrics need the same weight/dimension/recyclable views of
+        data['packages']; caching the arrays means the Python-level dict
+        walk happens once per pipeline run instead of once per metric.
+        """
+        cached = data.get('_pkg_arrays')
+        if cached is None:
+            packages = data.get('packages', [])
+            n = len(packages)
+            weights = np.fromiter(
+                (p.get('weight', 0) for p in packages), dtype=np.float64, count=n
+            )
+            dims = np.array([
+                [d.get('length', 0), d.get('width', 0), d.get('height', 0)]
+                for d in (p.get('dimensions', {}) for p in packages)
+            ], dtype=np.float64).reshape(n, 3)
+            recyclable = np.fromiter(
+                (p.get('recyclable', False) for p in packages), dtype=bool, count=n
+            )
+            cached = data['_pkg_arrays'] = (weights, dims, dims.prod(axis=1), recyclable)
+        return cached
+
     def _calculate_carbon_footprint(self, data: Dict) -> float:
         """Calculate carbon footprint based on shipment data"""
         # Example calculation - would be more complex in production
-        distance = self._calculate_distance(data['origin'], data['destination'])
-        transport_emissions = {
-            'truck': 0.1,  # kg CO2 per km
-            'train': 0.04,
-            'ship': 0.02,
-            'air': 0.5
-        }
-        return distance * transport_emissions.get(data['transport_mode'], 0.1)
+        distance = self._shipment_distance(data)
+        return distance * _EMISSIONS_KG_PER_KM.get(data['transport_mode'], 0.1)
 
     def _calculate_resource_efficiency(self, data: Dict) -> float:
         """Calculate resource efficiency score based on packaging and transport utilization"""
@@ -163,15 +461,10 @@ class LogisticsSustainabilityPipeline:
             if not packages:
                 return 0.0
 
-            # Calculate volume utilization
-            total_volume = sum(
-                dim.get('length', 0) * dim.get('width', 0) * dim.get('height', 0)
-                for package in packages
-                for dim in [package.get('dimensions', {})]
-            )
+            weights, _, volumes, recyclable = self._package_arrays(data)
 
-            # Calculate weight utilization
-            total_weight = sum(package.get('weight', 0) for package in packages)
+            total_volume = volumes.sum()
+            total_weight = weights.sum()
 
             # Standard container metrics (example values)
             standard_container = {
@@ -184,7 +477,7 @@ class LogisticsSustainabilityPipeline:
             weight_utilization = min(total_weight / standard_container['max_weight'], 1.0)
 
             # Material efficiency (percentage of recyclable packages)
-            material_efficiency = sum(1 for p in packages if p.get('recyclable', False)) / len(packages)
+            material_efficiency = recyclable.mean()
 
             # Weighted score (can be adjusted based on importance)
             resource_efficiency = (
@@ -206,41 +499,25 @@ class LogisticsSustainabilityPipeline:
             if not packages:
                 return 0.0
 
-            # Define material recycling rates
-            material_recycling_rates = {
-                'cardboard': 0.85,
-                'paper': 0.80,
-                'plastic': 0.30,
-                'metal': 0.90,
-                'glass': 0.75,
-                'wood': 0.60
-            }
+            weights, _, volumes, recyclable = self._package_arrays(data)
+
+            # Base score from material recyclability
+            material_scores = np.array([
+                _MATERIAL_RECYCLING_RATES.get(p.get('material_type', '').lower(), 0.1)
+                for p in packages
+            ])
 
-            # Calculate waste reduction score
-            total_score = 0
-            for package in packages:
-                material_type = package.get('material_type', '').lower()
-                weight = package.get('weight', 0)
-                
-                # Base score from material recyclability
-                material_score = material_recycling_rates.get(material_type, 0.1)
-                
-                # Adjust for package properties
-                if package.get('recyclable', False):
-                    material_score *= 1.2  # 20% bonus for recyclable packaging
-                
-                # Volume efficiency (penalize oversized packaging)
-                dimensions = package.get('dimensions', {})
-                volume = dimensions.get('length', 0) * dimensions.get('width', 0) * dimensions.get('height', 0)
-                density = weight / volume if volume > 0 else 0
-                if density < 0.1:  # Example threshold for inefficient packaging
-                    material_score *= 0.8  # 20% penalty for inefficient volume usage
-                
-                total_score += material_score * weight
+            # 20% bonus for recyclable packaging
+            material_scores = material_scores * np.where(recyclable, 1.2, 1.0)
+
+            # Volume efficiency (penalize oversized packaging): 20% penalty
+            # where density falls under the inefficiency threshold
+            densities = np.where(volumes > 0, weights / np.where(volumes > 0, volumes, 1.0), 0.0)
+            material_scores = material_scores * np.where(densities < 0.1, 0.8, 1.0)
 
             # Normalize score to 0-100 range
-            normalized_score = (total_score / (sum(p.get('weight', 0) for p in packages))) * 100
-            return round(normalized_score, 2)
+            normalized_score = (material_scores * weights).sum() / weights.sum() * 100
+            return round(float(normalized_score), 2)
 
         except Exception as e:
             logger.error(f"Error calculating waste reduction: {str(e)}")
@@ -249,33 +526,16 @@ class LogisticsSustainabilityPipeline:
     def _calculate_energy_efficiency(self, data: Dict) -> float:
         """Calculate energy efficiency metrics based on transport mode and distance"""
         try:
-            # Energy efficiency factors (MJ/tonne-km) for different transport modes
-            energy_factors = {
-                'truck': 2.5,
-                'train': 0.6,
-                'ship': 0.2,
-                'air': 8.0
-            }
-
             transport_mode = data.get('transport_mode', 'truck').lower()
-            distance = self._calculate_distance(data['origin'], data['destination'])
-            total_weight = sum(p.get('weight', 0) for p in data.get('packages', []))
-            
-            # Convert weight to tonnes
-            weight_tonnes = total_weight / 1000
-            
-            # Calculate base energy consumption
-            base_energy = distance * weight_tonnes * energy_factors.get(transport_mode, 2.5)
-            
-            # Calculate efficiency score (inverse relationship - lower energy use is better)
-            max_energy = distance * weight_tonnes * max(energy_factors.values())
-            min_energy = distance * weight_tonnes * min(energy_factors.values())
-            
-            if max_energy == min_energy:
+
+            # The distance*weight factor cancels from the min-max scaling,
+            # so the score reduces to a per-mode constant. The one place
+            # the factor mattered was the zero edge case (max == min),
+            # which returned a perfect score - keep that behaviour
+            if self._shipment_distance(data) == 0 or self._package_arrays(data)[0].sum() == 0:
                 return 100.0
-            
-            efficiency_score = (1 - (base_energy - min_energy) / (max_energy - min_energy)) * 100
-            return round(efficiency_score, 2)
+
+            return _ENERGY_SCORES.get(transport_mode, _ENERGY_SCORES['truck'])
 
         except Exception as e:
             logger.error(f"Error calculating energy efficiency: {str(e)}")
@@ -283,21 +543,25 @@ class LogisticsSustainabilityPipeline:
 
     def _calculate_distance(self, origin: Dict[str, float], destination: Dict[str, float]) -> float:
         """Calculate distance between two points using Haversine formula"""
-        R = 6371  # Earth's radius in kilometers
+        return _haversine_cached(round(origin['lat'], 4), round(origin['long'], 4),
+                                 round(destination['lat'], 4), round(destination['long'], 4))
 
-        lat1, lon1 = origin['lat'], origin['long']
-        lat2, lon2 = destination['lat'], destination['long']
-        
-        phi1, phi2 = np.radians(lat1), np.radians(lat2)
-        delta_phi = np.radians(lat2 - lat1)
-        delta_lambda = np.radians(lon2 - lon1)
-
-        a = np.sin(delta_phi/2)**2 + \
-            np.cos(phi1) * np.cos(phi2) * \
-            np.sin(delta_lambda/2)**2
-        c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1-a))
-        
-        return R * c
+    def _shipment_distance(self, data: Dict) -> float:
+        """Distance for this shipment, computed once per pipeline run.
+
+        Several metrics (carbon footprint, energy efficiency, route and
+        anomaly checks) need the same distance; memoize it on the shipment
+        dict so they share one calculation.
+        """
+        if '_distance_km' not in data:
+            data['_distance_km'] = self._calculate_distance(data['origin'], data['destination'])
+        return data['_distance_km']
+
+    def calculate_distances(self, shipments: List[Dict]) -> np.ndarray:
+        """Distances for a batch of shipments in a single vectorized call."""
+        origins = np.array([[s['origin']['lat'], s['origin']['long']] for s in shipments])
+        destinations = np.array([[s['destination']['lat'], s['destination']['long']] for s in shipments])
+        return haversine_vector(origins, destinations)
 
     def _identify_optimization_opportunities(self, data: Dict) -> List[Dict]:
         """Identify potential areas for optimization"""
@@ -321,10 +585,10 @@ class LogisticsSustainabilityPipeline:
             
         return opportunities
 
-    def _analyze_trends(self, data: Dict) -> Dict:
+    def _analyze_trends(self, data: Dict, metrics: Dict) -> Dict:
         """Analyze trends in the data"""
         return {
-            'historical_comparison': self._compare_historical_data(data),
+            'historical_comparison': self._compare_historical_data(data, metrics),
             'seasonal_patterns': self._identify_seasonal_patterns(data),
             'anomalies': self._detect_anomalies(data)
         }
@@ -336,7 +600,11 @@ class LogisticsSustainabilityPipeline:
         """
         # Example optimization check 
         # You could add more complex logic here
-        distance = self._calculate_distance(data['origin'], data['destination'])
+        # A memoized exact distance is free to reuse; otherwise the cheap
+        # equirectangular approximation is plenty for a >500 km gate
+        distance = data.get('_distance_km')
+        if distance is None:
+            distance = _distance_fast_km(data['origin'], data['destination'])
         return distance > 500  # Example: suggest optimization for routes over 500 km
 
     def _can_optimize_packaging(self, data: Dict) -> bool:
@@ -344,19 +612,12 @@ class LogisticsSustainabilityPipeline:
         Check if packaging can be optimized.
         This also needs to be improved
         """
-        # Check packaging efficiency
-        packages = data.get('packages', [])
-        
-        # Example checks:
-        # 1. Check if any non-recyclable packages exist
-        non_recyclable_packages = [p for p in packages if not p.get('recyclable', False)]
-        
-        # 2. Check if packages are inefficiently sized
-        oversized_packages = [p for p in packages if any(
-            dim > 50 for dim in p.get('dimensions', {}).values()
-        )]
-        
-        return bool(non_recyclable_packages or oversized_packages)
+        # Check packaging efficiency against the cached package arrays;
+        # the cheaper recyclable test runs before the dims comparison
+        weights, dims, _, recyclable = self._package_arrays(data)
+        if weights.size == 0:
+            return False
+        return bool((~recyclable).any() or (dims > 50).any())
     
     def _identify_seasonal_patterns(self, data: Dict) -> Dict:
         """Identify seasonal patterns in shipping data"""
@@ -365,44 +626,11 @@ class LogisticsSustainabilityPipeline:
             if not timestamp:
                 return {'season': 'unknown', 'patterns': []}
 
-            month = timestamp.month
-            seasons = {
-                (12, 1, 2): 'winter',
-                (3, 4, 5): 'spring',
-                (6, 7, 8): 'summer',
-                (9, 10, 11): 'fall'
-            }
-            current_season = next(
-                season for months, season in seasons.items() if month in months
-            )
-
-            # Example seasonal patterns (would be based on historical data in production) TODO: 
-            seasonal_impacts = {
-                'winter': [
-                    {'factor': 'weather_delays', 'impact': 'high'},
-                    {'factor': 'energy_consumption', 'impact': 'high'},
-                    {'factor': 'route_restrictions', 'impact': 'medium'}
-                ],
-                'summer': [
-                    {'factor': 'cooling_requirements', 'impact': 'high'},
-                    {'factor': 'traffic_congestion', 'impact': 'medium'},
-                    {'factor': 'delivery_windows', 'impact': 'low'}
-                ],
-                'spring': [
-                    {'factor': 'route_flexibility', 'impact': 'high'},
-                    {'factor': 'energy_consumption', 'impact': 'medium'},
-                    {'factor': 'delivery_efficiency', 'impact': 'high'}
-                ],
-                'fall': [
-                    {'factor': 'weather_variability', 'impact': 'medium'},
-                    {'factor': 'route_optimization', 'impact': 'high'},
-                    {'factor': 'delivery_volume', 'impact': 'medium'}
-                ]
-            }
+            current_season = _MONTH_TO_SEASON[timestamp.month]
 
             return {
                 'season': current_season,
-                'patterns': seasonal_impacts.get(current_season, [])
+                'patterns': _SEASONAL_IMPACTS.get(current_season, [])
             }
 
         except Exception as e:
@@ -415,7 +643,7 @@ class LogisticsSustainabilityPipeline:
             anomalies = []
             
             # Check distance anomalies
-            distance = self._calculate_distance(data['origin'], data['destination'])
+            distance = self._shipment_distance(data)
             if distance > 1000:  # Example threshold
                 anomalies.append({
                     'type': 'distance',
@@ -424,21 +652,19 @@ class LogisticsSustainabilityPipeline:
                     'recommendation': 'Consider regional fulfillment centers'
                 })
 
-            # Check packaging anomalies
+            # Check packaging anomalies: the density mask runs as one
+            # vectorized comparison over the cached package arrays, and only
+            # the offending indices touch Python objects again
             packages = data.get('packages', [])
-            for package in packages:
-                weight = package.get('weight', 0)
-                dimensions = package.get('dimensions', {})
-                volume = dimensions.get('length', 0) * dimensions.get('width', 0) * dimensions.get('height', 0)
-                
-                # Density check
-                if volume > 0 and (weight / volume) < 0.01:
-                    anomalies.append({
-                        'type': 'packaging',
-                        'severity': 'medium',
-                        'description': f'Inefficient packaging detected for package {package.get("package_id")}',
-                        'recommendation': 'Review packaging size optimization'
-                    })
+            weights, _, volumes, _ = self._package_arrays(data)
+            low_density = np.flatnonzero((volumes > 0) & (weights < 0.01 * volumes))
+            for i in low_density:
+                anomalies.append({
+                    'type': 'packaging',
+                    'severity': 'medium',
+                    'description': f'Inefficient packaging detected for package {packages[i].get("package_id")}',
+                    'recommendation': 'Review packaging size optimization'
+                })
 
             # Transport mode anomalies
             transport_mode = data.get('transport_mode')
@@ -456,12 +682,11 @@ class LogisticsSustainabilityPipeline:
             logger.error(f"Error detecting anomalies: {str(e)}")
             return []
 
-    def _compare_historical_data(self, data: Dict) -> Dict:
+    def _compare_historical_data(self, data: Dict, current_metrics: Dict) -> Dict:
         """Compare current shipment with historical data for trend analysis"""
         try:
             # In production, this would query a database for historical data
             # For demonstration, we'll create example comparisons
-            current_metrics = self._calculate_sustainability_metrics(data)
             
             return {
                 'comparison_status': 'completed',
@@ -539,7 +764,7 @@ def run_pipeline():
     result = pipeline.process_data(sample_data)
     return result
 
-import json
+import orjson
 
 if __name__ == "__main__":
     def main():
@@ -547,7 +772,11 @@ if __name__ == "__main__":
         
         print("Pipeline Processing Result:")
         print("------------------------")
-        # Use json.dumps() to pretty print with indentation
-        print(json.dumps(result, indent=2, default=str))
+        # orjson serializes straight to bytes and handles NumPy scalars
+        print(orjson.dumps(
+            result,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY,
+            default=str
+        ).decode())
     
     main()
\ No newline at end of file
@@ -0,0 +1,17 @@
+# Gunicorn configuration for the CarbonCare API.
+#
+# The endpoints spend most of their time blocked on HuggingFace inference
+# calls, so threaded workers let many LLM requests stay in flight instead of
+# serializing behind the single-threaded Flask dev server.
+#
+# Run with: gunicorn -c gunicorn.conf.py app:app
+
+bind = "0.0.0.0:5000"
+# Single worker: app.py tracks uploads and background jobs in per-process
+# dicts (UPLOADS/JOBS), so a second worker would 404 on status polls and
+# upload_id lookups that land on the wrong process. The threads carry the
+# concurrency; revisit if that state ever moves to a shared store.
+workers = 1
+worker_class = "gthread"
+threads = 16
+timeout = 120
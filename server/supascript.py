@@ -1,95 +1,85 @@
-import json
+# supascript.py
+
 import datetime
-import math
-from typing import Any, Dict
-from supabase_client import supabase  # Ensure this imports the initialized Supabase client
 import logging
 
+import orjson
+from itertools import islice
+from typing import Any, Dict, List, Union
+from supabase_client import supabase  # Ensure this imports the initialized Supabase client
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Supabase caps rows per insert; chunk anything larger
+INSERT_BATCH_SIZE = 500
+
 
 def replace_nan(obj: Any) -> Any:
-    """Recursively replace NaN values in a nested structure with None."""
-    if isinstance(obj, dict):
-        return {k: replace_nan(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [replace_nan(item) for item in obj]
-    elif isinstance(obj, float):
-        return None if math.isnan(obj) else obj
-    else:
-        return obj
+    """Replace NaN values in a nested structure with None.
 
+    orjson encodes NaN as null, so one C-level dumps/loads round-trip
+    scrubs an arbitrarily nested payload without recursing through it in
+    Python. NumPy scalars are normalized to plain numbers along the way.
+    """
+    return orjson.loads(
+        orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY, default=str)
+    )
 
-# supascript.py
 
-import datetime
-import math
-import logging
-from typing import Any, Dict
-from supabase_client import supabase  # Ensure this imports the initialized Supabase client
+def _build_row(payload: Dict[str, Any], user_id: str) -> Dict[str, Any]:
+    """Build one sustainability_analytics row from an analysis payload."""
+    num_shipments = payload['batch_analysis']['num_shipments_analyzed']
+    if num_shipments is None:
+        num_shipments = len(payload.get('results', []))
+        logger.warning("num_shipments_analyzed not found. Using length of results.")
 
-# Configure logging
-logger = logging.getLogger(__name__)
+    # Validate that num_shipments is an integer
+    if not isinstance(num_shipments, int):
+        raise ValueError(f"'num_shipments_analyzed' must be an integer, got {type(num_shipments)}")
 
-def replace_nan(obj: Any) -> Any:
-    """Recursively replace NaN values in a nested structure with None."""
-    if isinstance(obj, dict):
-        return {k: replace_nan(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [replace_nan(item) for item in obj]
-    elif isinstance(obj, float):
-        return None if math.isnan(obj) else obj
-    else:
-        return obj
-
-def push_sustainability_data(payload: Dict[str, Any], user_id: str):
+    return {
+        "user_id": user_id,
+        "timestamp": datetime.datetime.now().isoformat(),
+        "num_shipments": num_shipments,
+        "data": payload['batch_analysis']
+    }
+
+
+def push_sustainability_data(payload: Union[Dict[str, Any], List[Dict[str, Any]]], user_id: str):
     """
     Pushes sustainability data to Supabase.
 
+    Accepts a single analysis payload or a list of them. All rows are sent
+    with one INSERT per 500-row chunk instead of one round trip per row.
+
     Args:
-        payload (dict): The data payload to insert into Supabase.
+        payload (dict | list): The data payload(s) to insert into Supabase.
         user_id (str): The ID of the user pushing the data.
     """
     try:
-        logger.info(f"Received payload: {payload}")
-
-        # Extract num_shipments from payload
-        num_shipments = payload['batch_analysis']['num_shipments_analyzed']
-        if num_shipments is None:
-            num_shipments = len(payload.get('results', []))
-            logger.warning("num_shipments_analyzed not found. Using length of results.")
-
-        logger.info(f"Extracted num_shipments: {num_shipments}")
-
-        # Validate that num_shipments is an integer
-        if not isinstance(num_shipments, int):
-            raise ValueError(f"'num_shipments_analyzed' must be an integer, got {type(num_shipments)}")
-
-        # Structure the payload to match Supabase table schema
-        insertion_payload = {
-            "user_id": user_id,
-            "timestamp": datetime.datetime.now().isoformat(),
-            "num_shipments": num_shipments,
-            "data": payload['batch_analysis']
-        }
+        payloads = payload if isinstance(payload, list) else [payload]
+        logger.info("Received %d payload(s)", len(payloads))
 
-        # Replace NaN values with None
-        safe_insertion_payload = replace_nan(insertion_payload)
-        logger.info(f"Safe Insertion Payload: {safe_insertion_payload}")
+        rows = [replace_nan(_build_row(item, user_id)) for item in payloads]
 
-        # Insert data into Supabase
-        response = supabase.table("sustainability_analytics").insert(safe_insertion_payload).execute()
+        # Insert data into Supabase, batched
+        iterator = iter(rows)
+        while True:
+            chunk = list(islice(iterator, INSERT_BATCH_SIZE))
+            if not chunk:
+                break
+            response = supabase.table("sustainability_analytics").insert(chunk).execute()
 
+            # Handle response based on status code
+            if not response.data:
+                logger.error("Failed to push data. Error: %s - %s",
+                             response.status_code, response.text)
+                raise Exception(f"Failed to push data. Error: {response.status_code} - {response.text}")
 
-        # Handle response based on status code
-        if not response.data:
-            logger.error(f"Failed to push data. Error: {response.status_code} - {response.text}")
-            raise Exception(f"Failed to push data. Error: {response.status_code} - {response.text}")
-        else:
-            logger.info("Data pushed to Supabase successfully.")
+        logger.info("Data pushed to Supabase successfully.")
 
     except Exception as e:
         logger.exception("Error pushing sustainability data:")
-        raise e
\ No newline at end of file
+        raise e
@@ -1,8 +1,11 @@
-from sklearn.ensemble import RandomForestRegressor
+import math
+
+import joblib
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.inspection import permutation_importance
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
 import numpy as np
-import pandas as pd
 from typing import Dict, List, Tuple
 from dataclasses import dataclass
 
@@ -10,8 +13,60 @@ from dataprocessing import (
     LogisticsSustainabilityPipeline
 )
 
+try:
+    from numba import njit
+except ImportError:
+    # numba is an optional accelerator - without it the kernels below run
+    # as plain NumPy/Python, just without JIT compilation
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        def wrap(func):
+            return func
+        return wrap
+
+@njit(cache=True, fastmath=True)
+def _haversine_kernel(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Scalar haversine distance in km, JIT-compiled when numba is present.
+
+    math-module transcendentals sidestep NumPy's per-scalar ufunc dispatch
+    in the interpreted fallback, and numba lowers them to the same LLVM
+    intrinsics either way; the asin form saves one trig call over arctan2.
+    """
+    R = 6371.0  # Earth's radius in kilometers
+
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    delta_phi = math.radians(lat2 - lat1)
+    delta_lambda = math.radians(lon2 - lon1)
+
+    a = math.sin(delta_phi/2)**2 + \
+        math.cos(phi1) * math.cos(phi2) * \
+        math.sin(delta_lambda/2)**2
+
+    return R * 2 * math.asin(math.sqrt(a))
+
+@njit(cache=True, fastmath=True)
+def _package_score_kernel(material_scores: np.ndarray, weights: np.ndarray,
+                          volumes: np.ndarray, recyclable: np.ndarray) -> float:
+    """Per-package PSI loop over pre-encoded numeric arrays"""
+    total = 0.0
+    for i in range(len(weights)):
+        density = weights[i] / volumes[i] if volumes[i] > 0 else 0.0
+        volume_score = min(density / 0.1, 1.0)
+        recyclable_bonus = 1.2 if recyclable[i] else 1.0
+        total += (material_scores[i] * 0.4 + volume_score * 0.6) * recyclable_bonus
+    return total / len(weights) if len(weights) > 0 else 0.0
+
+# Metric order shared by the vector/matrix paths below
+METRIC_NAMES = ('psi', 'res', 'cei', 'rur', 'eer', 'wrs')
+METRIC_WEIGHTS = np.array([0.2, 0.2, 0.2, 0.15, 0.15, 0.1])
+
+
 @dataclass
 class SustainabilityMetrics:
+    __slots__ = METRIC_NAMES
+
     psi: float  # Package Sustainability Index
     res: float  # Route Efficiency Score
     cei: float  # Carbon Emission Index
@@ -19,82 +74,122 @@ class SustainabilityMetrics:
     eer: float  # Energy Efficiency Rating
     wrs: float  # Waste Reduction Score
 
+    def as_vector(self) -> np.ndarray:
+        """The six metrics as an array in METRIC_NAMES order"""
+        return np.array([self.psi, self.res, self.cei, self.rur, self.eer, self.wrs])
+
 class SustainabilityScoring:
-    def __init__(self):
-        self.weights = {
-            'psi': 0.2,
-            'res': 0.2,
-            'cei': 0.2,
-            'rur': 0.15,
-            'eer': 0.15,
-            'wrs': 0.1
-        }
-        
-    def calculate_psi(self, package_data: List[Dict]) -> float:
+    """Stateless sustainability metric calculators.
+
+    All factor tables are class-level constants and every method is a
+    staticmethod - no instance state exists, so calls skip the bound-
+    method and self-attribute machinery entirely.
+    """
+
+    weights = {
+        'psi': 0.2,
+        'res': 0.2,
+        'cei': 0.2,
+        'rur': 0.15,
+        'eer': 0.15,
+        'wrs': 0.1
+    }
+
+    material_scores = {
+        'cardboard': 0.9,
+        'paper': 0.85,
+        'plastic': 0.4,
+        'metal': 0.7,
+        'glass': 0.8,
+        'wood': 0.75
+    }
+
+    material_efficiency = {
+        'cardboard': 90,
+        'paper': 85,
+        'plastic': 40,
+        'metal': 80,
+        'glass': 75,
+        'wood': 70
+    }
+
+    # Route efficiency factor by transport mode
+    mode_factors = {
+        'truck': 0.7,
+        'train': 0.9,
+        'ship': 0.85,
+        'air': 0.3
+    }
+
+    # kg CO2 per tonne-km
+    emission_factors = {
+        'truck': 0.062,
+        'train': 0.022,
+        'ship': 0.015,
+        'air': 0.602
+    }
+    max_emission_factor = max(emission_factors.values())
+
+    # Energy consumption factors (MJ/tonne-km)
+    energy_factors = {
+        'truck': 2.5,
+        'train': 0.6,
+        'ship': 0.2,
+        'air': 8.0
+    }
+    max_energy_factor = max(energy_factors.values())
+
+    @staticmethod
+    def calculate_psi(package_data: List[Dict]) -> float:
         """Calculate Package Sustainability Index"""
-        scores = []
-        for package in package_data:
-            material_scores = {
-                'cardboard': 0.9,
-                'paper': 0.85,
-                'plastic': 0.4,
-                'metal': 0.7,
-                'glass': 0.8,
-                'wood': 0.75
-            }
-            material_score = material_scores.get(package['material_type'].lower(), 0.3)
-            
-            dimensions = package['dimensions']
-            volume = dimensions['length'] * dimensions['width'] * dimensions['height']
-            density = package['weight'] / volume if volume > 0 else 0
-            volume_score = min(density / 0.1, 1.0)  # Normalize density score
-            recyclable_bonus = 1.2 if package.get('recyclable', False) else 1.0
-            
-            package_score = (material_score * 0.4 + volume_score * 0.6) * recyclable_bonus
-            scores.append(package_score)
-            
-        return np.mean(scores) * 100 if scores else 0
+        if not package_data:
+            return 0
+
+        # Pre-encode strings to numeric arrays so the scoring loop runs as a
+        # compiled kernel
+        materials = np.array(
+            [SustainabilityScoring.material_scores.get(p['material_type'].lower(), 0.3)
+             for p in package_data],
+            dtype=np.float64
+        )
+        weights = np.array([p['weight'] for p in package_data], dtype=np.float64)
+        volumes = np.array(
+            [p['dimensions']['length'] * p['dimensions']['width'] * p['dimensions']['height']
+             for p in package_data],
+            dtype=np.float64
+        )
+        recyclable = np.array([p.get('recyclable', False) for p in package_data],
+                              dtype=np.bool_)
 
-    def calculate_res(self, origin: Dict[str, float], destination: Dict[str, float], 
-                     transport_mode: str, distance: float) -> float:
+        return _package_score_kernel(materials, weights, volumes, recyclable) * 100
+
+    @staticmethod
+    def calculate_res(origin: Dict[str, float], destination: Dict[str, float], 
+                      transport_mode: str, distance: float) -> float:
         """Calculate Route Efficiency Score"""
-        mode_factors = {
-            'truck': 0.7,
-            'train': 0.9,
-            'ship': 0.85,
-            'air': 0.3
-        }
-        
         optimal_distance = distance
         
         actual_distance = distance  # TODO, get from routing API
         directness_score = min(optimal_distance / actual_distance, 1.0) if actual_distance > 0 else 0
         
-        mode_score = mode_factors.get(transport_mode.lower(), 0.5)
+        mode_score = SustainabilityScoring.mode_factors.get(transport_mode.lower(), 0.5)
         
         return (directness_score * 0.6 + mode_score * 0.4) * 100
 
-    def calculate_cei(self, distance: float, transport_mode: str, 
-                     total_weight: float) -> float:
+    @staticmethod
+    def calculate_cei(distance: float, transport_mode: str, 
+                      total_weight: float) -> float:
         """Calculate Carbon Emission Index"""
-        #  (kg CO2 per tonne-km)
-        emission_factors = {
-            'truck': 0.062,
-            'train': 0.022,
-            'ship': 0.015,
-            'air': 0.602
-        }
-        
-        factor = emission_factors.get(transport_mode.lower(), 0.062)
-        emissions = (distance * total_weight / 1000) * factor
-        
-        # Score inversely proportional to emissions (normalized)
-        max_emissions = (distance * total_weight / 1000) * max(emission_factors.values())
-        score = (1 - (emissions / max_emissions)) * 100
-        
+        # distance*weight/1000 multiplied both the emissions and the
+        # worst-mode baseline, so it cancels from the normalized ratio:
+        # the score is the mode's factor relative to the dirtiest mode
+        factor = SustainabilityScoring.emission_factors.get(transport_mode.lower(), 0.062)
+        score = (1 - factor / SustainabilityScoring.max_emission_factor) * 100
+
         return max(0, min(score, 100))
 
-    def calculate_rur(self, packages: List[Dict], container_capacity: Dict) -> float:
+    @staticmethod
+    def calculate_rur(packages: List[Dict], container_capacity: Dict) -> float:
         """Calculate Resource Utilization Rate"""
         total_volume = sum(
             p['dimensions']['length'] * p['dimensions']['width'] * p['dimensions']['height']
@@ -107,100 +202,127 @@ class SustainabilityScoring:
         
         return (volume_utilization * 0.5 + weight_utilization * 0.5) * 100
 
-    def calculate_eer(self, transport_mode: str, distance: float, 
-                     total_weight: float) -> float:
+    @staticmethod
+    def calculate_eer(transport_mode: str, distance: float, 
+                      total_weight: float) -> float:
         """Calculate Energy Efficiency Rating"""
-        # Energy consumption factors (MJ/tonne-km)
-        energy_factors = {
-            'truck': 2.5,
-            'train': 0.6,
-            'ship': 0.2,
-            'air': 8.0
-        }
-        
-        factor = energy_factors.get(transport_mode.lower(), 2.5)
-        energy_consumption = (distance * total_weight / 1000) * factor
-        
-        # Score inversely proportional to energy consumption (normalized)
-        max_consumption = (distance * total_weight / 1000) * max(energy_factors.values())
-        score = (1 - (energy_consumption / max_consumption)) * 100
-        
+        # Same cancellation as calculate_cei: the distance*weight factor
+        # drops out and the rating ranks the mode's energy intensity
+        factor = SustainabilityScoring.energy_factors.get(transport_mode.lower(), 2.5)
+        score = (1 - factor / SustainabilityScoring.max_energy_factor) * 100
+
         return max(0, min(score, 100))
 
-    def calculate_wrs(self, packages: List[Dict]) -> float:
+    @staticmethod
+    def calculate_wrs(packages: List[Dict]) -> float:
         """Calculate Waste Reduction Score"""
-        scores = []
-        for package in packages:
-            recyclable_score = 100 if package.get('recyclable', False) else 40
-            
-            material_efficiency = {
-                'cardboard': 90,
-                'paper': 85,
-                'plastic': 40,
-                'metal': 80,
-                'glass': 75,
-                'wood': 70
-            }
-            material_score = material_efficiency.get(package['material_type'].lower(), 30)
-            
-            dimensions = package['dimensions']
-            volume = dimensions['length'] * dimensions['width'] * dimensions['height']
-            density = package['weight'] / volume if volume > 0 else 0
-            optimization_score = min(density / 0.1, 1.0) * 100
-            
-            package_score = (recyclable_score * 0.4 + material_score * 0.3 + 
-                           optimization_score * 0.3)
-            scores.append(package_score)
-            
-        return np.mean(scores) if scores else 0
+        if not packages:
+            return 0
 
-    def calculate_overall_score(self, metrics: SustainabilityMetrics) -> float:
+        # Same SoA shape as calculate_psi: encode once, score vectorized
+        material_scores = np.array(
+            [SustainabilityScoring.material_efficiency.get(p['material_type'].lower(), 30)
+             for p in packages],
+            dtype=np.float64
+        )
+        weights = np.array([p['weight'] for p in packages], dtype=np.float64)
+        volumes = np.array(
+            [p['dimensions']['length'] * p['dimensions']['width'] * p['dimensions']['height']
+             for p in packages],
+            dtype=np.float64
+        )
+        recyclable = np.array([p.get('recyclable', False) for p in packages],
+                              dtype=np.bool_)
+
+        recyclable_scores = np.where(recyclable, 100.0, 40.0)
+        densities = np.where(volumes > 0, weights / np.where(volumes > 0, volumes, 1.0), 0.0)
+        optimization_scores = np.minimum(densities / 0.1, 1.0) * 100
+
+        package_scores = (recyclable_scores * 0.4 + material_scores * 0.3 +
+                          optimization_scores * 0.3)
+        return float(package_scores.mean())
+
+    @staticmethod
+    def calculate_overall_score(metrics: SustainabilityMetrics) -> float:
         """Calculate overall sustainability score"""
-        scores = {
-            'psi': metrics.psi,
-            'res': metrics.res,
-            'cei': metrics.cei,
-            'rur': metrics.rur,
-            'eer': metrics.eer,
-            'wrs': metrics.wrs
-        }
-        
-        weighted_score = sum(score * self.weights[metric] 
-                           for metric, score in scores.items())
-        
-        return round(weighted_score, 2)
+        return round(float(metrics.as_vector() @ METRIC_WEIGHTS), 2)
 
 class SustainabilityPredictor:
     def __init__(self):
-        self.model = RandomForestRegressor(n_estimators=100, random_state=42)
+        # Histogram-based gradient boosting: trains faster and predicts an
+        # order of magnitude faster than a 100-tree random forest at this
+        # feature count, with a fraction of the memory footprint
+        self.model = HistGradientBoostingRegressor(
+            max_iter=100, random_state=42, early_stopping=True
+        )
         self.scaler = StandardScaler()
         self.feature_columns = [
             'distance', 'weight', 'volume', 'is_recyclable', 
             'transport_mode_encoded', 'material_type_encoded'
         ]
         self.is_fitted = False
+        self._feature_importances = np.zeros(len(self.feature_columns))
+        # Fused standardization constants, cached after fit so inference
+        # is one broadcast instead of a scaler.transform dispatch
+        self._mean = None
+        self._inv_scale = None
         
-    def prepare_features(self, data: Dict) -> pd.DataFrame:
-        """Prepare features for ML model"""
-        features = {
-            'distance': self._calculate_distance(data['origin'], data['destination']),
-            'weight': sum(p['weight'] for p in data['packages']),
-            'volume': sum(
+    def prepare_features(self, data: Dict) -> np.ndarray:
+        """Prepare features for ML model as a (1, n_features) array.
+
+        The scaler and model work on plain arrays, so building a one-row
+        DataFrame here only added Index/BlockManager overhead per call.
+        Column order follows self.feature_columns.
+        """
+        return np.array([[
+            self._calculate_distance(data['origin'], data['destination']),
+            sum(p['weight'] for p in data['packages']),
+            sum(
                 p['dimensions']['length'] * p['dimensions']['width'] * p['dimensions']['height']
                 for p in data['packages']
             ),
-            'is_recyclable': all(p.get('recyclable', False) for p in data['packages']),
-            'transport_mode_encoded': self._encode_transport_mode(data['transport_mode']),
-            'material_type_encoded': self._encode_material_type(
-                data['packages'][0]['material_type']
+            float(all(p.get('recyclable', False) for p in data['packages'])),
+            self._encode_transport_mode(data['transport_mode']),
+            self._encode_material_type(data['packages'][0]['material_type'])
+        ]], dtype=np.float64)
+
+    def prepare_features_batch(self, data_list: List[Dict]) -> np.ndarray:
+        """(N, n_features) feature matrix for many shipments in one pass.
+
+        Distances come from a single vectorized haversine call and the
+        matrix is stacked once column-wise, instead of one 1-row frame
+        plus one scalar trig chain per shipment. Column order follows
+        self.feature_columns.
+        """
+        return np.column_stack([
+            _batch_distances(data_list),
+            np.array(
+                [sum(p['weight'] for p in d['packages']) for d in data_list],
+                dtype=np.float64
+            ),
+            np.array(
+                [sum(p['dimensions']['length'] * p['dimensions']['width'] * p['dimensions']['height']
+                     for p in d['packages'])
+                 for d in data_list],
+                dtype=np.float64
+            ),
+            np.array(
+                [all(p.get('recyclable', False) for p in d['packages']) for d in data_list],
+                dtype=np.float64
+            ),
+            self._encode_batch(
+                [d['transport_mode'] for d in data_list],
+                self._MODES_SORTED, self._MODE_CODES_SORTED, 0
+            ),
+            self._encode_batch(
+                [d['packages'][0]['material_type'] for d in data_list],
+                self._MATERIALS_SORTED, self._MATERIAL_CODES_SORTED, 0
             )
-        }
-        return pd.DataFrame([features])
+        ])
 
     def train(self, historical_data: List[Dict], historical_scores: List[float]):
         """Train the ML model on historical data"""
-        X = pd.DataFrame([self.prepare_features(data).iloc[0] 
-                         for data in historical_data])
+        X = self.prepare_features_batch(historical_data)
         y = np.array(historical_scores)
         
         X_train, X_test, y_train, y_test = train_test_split(
@@ -209,10 +331,19 @@ class SustainabilityPredictor:
         
         X_train_scaled = self.scaler.fit_transform(X_train)
         X_test_scaled = self.scaler.transform(X_test)
+        self._mean = self.scaler.mean_
+        self._inv_scale = 1.0 / self.scaler.scale_
         
         # Train model
         self.model.fit(X_train_scaled, y_train)
         self.is_fitted = True
+
+        # HistGradientBoosting does not expose feature_importances_, so
+        # compute permutation importances on the held-out split once here
+        # rather than at every predict call
+        self._feature_importances = permutation_importance(
+            self.model, X_test_scaled, y_test, n_repeats=5, random_state=42
+        ).importances_mean
         
         # model performance metrics
         train_score = self.model.score(X_train_scaled, y_train)
@@ -223,56 +354,222 @@ class SustainabilityPredictor:
             'test_score': test_score
         }
 
+    def save(self, path: str):
+        """Persist the trained model, scaler and importances to disk."""
+        if not self.is_fitted:
+            raise ValueError("Model needs to be trained before saving. Call train() first.")
+        joblib.dump({
+            'model': self.model,
+            'scaler': self.scaler,
+            'feature_importances': self._feature_importances
+        }, path)
+
+    def load(self, path: str):
+        """Load a previously saved model instead of retraining.
+
+        Arrays are memory-mapped (the dump is uncompressed for this
+        reason), so multiple worker processes share one copy of the
+        estimator state in RAM.
+        """
+        state = joblib.load(path, mmap_mode='r')
+        self.model = state['model']
+        self.scaler = state['scaler']
+        self._feature_importances = state['feature_importances']
+        self._mean = self.scaler.mean_
+        self._inv_scale = 1.0 / self.scaler.scale_
+        self.is_fitted = True
+
+    def predict_sustainability_batch(self, shipments: List[Dict]) -> List[Dict[str, float]]:
+        """Predict sustainability metrics for a batch of shipments.
+
+        Builds one feature matrix and runs a single scaler.transform and
+        model.predict over it instead of one inference call per shipment.
+        """
+        if not self.is_fitted:
+            raise ValueError("Model needs to be trained before making predictions. Call train() first.")
+
+        features = self.prepare_features_batch(shipments)
+        features_scaled = (features - self._mean) * self._inv_scale
+
+        predictions = self.model.predict(features_scaled)
+
+        importances = dict(zip(
+            self.feature_columns,
+            self._feature_importances
+        ))
+
+        return [
+            {
+                'predicted_score': prediction,
+                'feature_importances': importances
+            }
+            for prediction in predictions
+        ]
+
     def predict_sustainability(self, shipment_data: Dict) -> Dict[str, float]:
         """Predict sustainability metrics for new shipment"""
         if not self.is_fitted:
             raise ValueError("Model needs to be trained before making predictions. Call train() first.")
             
         features = self.prepare_features(shipment_data)
-        features_scaled = self.scaler.transform(features)
+        features_scaled = (features - self._mean) * self._inv_scale
         
         prediction = self.model.predict(features_scaled)[0]
         
         importances = dict(zip(
             self.feature_columns,
-            self.model.feature_importances_
+            self._feature_importances
         ))
         
         return {
             'predicted_score': prediction,
             'feature_importances': importances
         }
+    _TRANSPORT_MODE_CODES = {'truck': 0, 'train': 1, 'ship': 2, 'air': 3}
+    _MATERIAL_TYPE_CODES = {
+        'cardboard': 0, 'paper': 1, 'plastic': 2,
+        'metal': 3, 'glass': 4, 'wood': 5
+    }
+
+    # Sorted name/code pairs for vectorized batch encoding via searchsorted.
+    # map() rather than a comprehension: comprehension scopes cannot see
+    # class-scope names, so a listcomp here would NameError at class creation.
+    _MODES_SORTED = np.sort(np.array(list(_TRANSPORT_MODE_CODES)))
+    _MODE_CODES_SORTED = np.array(list(map(_TRANSPORT_MODE_CODES.get, _MODES_SORTED)))
+    _MATERIALS_SORTED = np.sort(np.array(list(_MATERIAL_TYPE_CODES)))
+    _MATERIAL_CODES_SORTED = np.array(list(map(_MATERIAL_TYPE_CODES.get, _MATERIALS_SORTED)))
+
+    @staticmethod
+    def _encode_batch(values: List[str], sorted_names: np.ndarray,
+                      sorted_codes: np.ndarray, default: int) -> np.ndarray:
+        """Encode a string column in one searchsorted pass.
+
+        Unknown values fall back to the same default the scalar encoders
+        use, so batch and single-shipment features agree.
+        """
+        arr = np.char.lower(np.asarray(values, dtype=str))
+        idx = np.minimum(np.searchsorted(sorted_names, arr), len(sorted_names) - 1)
+        return np.where(sorted_names[idx] == arr, sorted_codes[idx], default).astype(np.float64)
+
     def _encode_transport_mode(self, mode: str) -> int:
         """Encode transport mode as integer"""
-        modes = {'truck': 0, 'train': 1, 'ship': 2, 'air': 3}
-        return modes.get(mode.lower(), 0)
+        return self._TRANSPORT_MODE_CODES.get(mode.lower(), 0)
 
     def _encode_material_type(self, material: str) -> int:
         """Encode material type as integer"""
-        materials = {
-            'cardboard': 0, 'paper': 1, 'plastic': 2,
-            'metal': 3, 'glass': 4, 'wood': 5
-        }
-        return materials.get(material.lower(), 0)
+        return self._MATERIAL_TYPE_CODES.get(material.lower(), 0)
 
-    def _calculate_distance(self, origin: Dict[str, float], 
+    def _calculate_distance(self, origin: Dict[str, float],
                           destination: Dict[str, float]) -> float:
         """Calculate distance between two points using Haversine formula"""
-        R = 6371  # Earth's radius in kilometers
+        return _haversine_kernel(
+            origin['lat'], origin['long'],
+            destination['lat'], destination['long']
+        )
 
-        lat1, lon1 = origin['lat'], origin['long']
-        lat2, lon2 = destination['lat'], destination['long']
-        
-        phi1, phi2 = np.radians(lat1), np.radians(lat2)
-        delta_phi = np.radians(lat2 - lat1)
-        delta_lambda = np.radians(lon2 - lon1)
-
-        a = np.sin(delta_phi/2)**2 + \
-            np.cos(phi1) * np.cos(phi2) * \
-            np.sin(delta_lambda/2)**2
-        c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1-a))
-        
-        return R * c
+def _batch_distances(shipments: List[Dict]) -> np.ndarray:
+    """Haversine distances for all shipments in one vectorized pass"""
+    R = 6371  # Earth's radius in kilometers
+
+    lat1 = np.array([s['origin']['lat'] for s in shipments], dtype=np.float64)
+    lon1 = np.array([s['origin']['long'] for s in shipments], dtype=np.float64)
+    lat2 = np.array([s['destination']['lat'] for s in shipments], dtype=np.float64)
+    lon2 = np.array([s['destination']['long'] for s in shipments], dtype=np.float64)
+
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    delta_phi = np.radians(lat2 - lat1)
+    delta_lambda = np.radians(lon2 - lon1)
+
+    a = np.sin(delta_phi/2)**2 + \
+        np.cos(phi1) * np.cos(phi2) * \
+        np.sin(delta_lambda/2)**2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1-a))
+
+    return R * c
+
+def analyze_sustainability_batch(pipeline: LogisticsSustainabilityPipeline,
+                                 shipments: List[Dict],
+                                 predictor: SustainabilityPredictor = None) -> List[Dict]:
+    """Batch variant of analyze_sustainability.
+
+    Route distances for the whole batch come from one vectorized haversine
+    pass, each shipment's distance and total weight are computed once and
+    shared across the metric calculations, and ML inference happens in a
+    single predict call instead of one per shipment.
+    """
+    # BATCH_SCHEMA allows an empty shipment list; sklearn's predict does not
+    if not shipments:
+        return []
+
+    scorer = SustainabilityScoring()
+
+    if predictor is None:
+        predictor = SustainabilityPredictor()
+
+    distances = _batch_distances(shipments)
+    predictions = predictor.predict_sustainability_batch(shipments)
+
+    processed = []
+    metrics_list = []
+    for shipment_data, distance in zip(shipments, distances):
+        processed.append(pipeline.process_data(shipment_data))
+        total_weight = sum(p['weight'] for p in shipment_data['packages'])
+
+        metrics_list.append(SustainabilityMetrics(
+            psi=scorer.calculate_psi(shipment_data['packages']),
+            res=scorer.calculate_res(
+                shipment_data['origin'],
+                shipment_data['destination'],
+                shipment_data['transport_mode'],
+                distance
+            ),
+            cei=scorer.calculate_cei(
+                distance,
+                shipment_data['transport_mode'],
+                total_weight
+            ),
+            rur=scorer.calculate_rur(
+                shipment_data['packages'],
+                {'volume': 67.6, 'max_weight': 26755}  # Standard container
+            ),
+            eer=scorer.calculate_eer(
+                shipment_data['transport_mode'],
+                distance,
+                total_weight
+            ),
+            wrs=scorer.calculate_wrs(shipment_data['packages'])
+        ))
+
+    # NaN-scrub all metric values in one vectorized pass instead of
+    # per-value isnan checks while the response is assembled
+    metric_matrix = np.array(
+        [m.as_vector() for m in metrics_list],
+        dtype=np.float64
+    ).reshape(len(metrics_list), 6)
+    # One matvec scores every shipment at once
+    overall = np.round(metric_matrix @ METRIC_WEIGHTS, 2)
+
+    clean_metrics = np.where(np.isnan(metric_matrix), None, metric_matrix.astype(object))
+    clean_overall = np.where(np.isnan(overall), None, overall.astype(object))
+
+    results = []
+    for row, overall_score, shipment_predictions, processed_data in zip(
+            clean_metrics, clean_overall, predictions, processed):
+        results.append({
+            'metrics': {
+                'package_sustainability_index': row[0],
+                'route_efficiency_score': row[1],
+                'carbon_emission_index': row[2],
+                'resource_utilization_rate': row[3],
+                'energy_efficiency_rating': row[4],
+                'waste_reduction_score': row[5]
+            },
+            'overall_sustainability_score': overall_score,
+            'predictions': shipment_predictions,
+            'processed_data': processed_data
+        })
+
+    return results
 
 # Example usage:
 def analyze_sustainability(pipeline: LogisticsSustainabilityPipeline,
@@ -284,39 +581,39 @@ def analyze_sustainability(pipeline: LogisticsSustainabilityPipeline,
         predictor = SustainabilityPredictor()
     
     processed_data = pipeline.process_data(shipment_data)
-    
+
+    # Shared subexpressions computed once: three metric calls need the
+    # distance and two need the total weight
+    packages = shipment_data['packages']
+    distance = pipeline._calculate_distance(
+        shipment_data['origin'],
+        shipment_data['destination']
+    )
+    total_weight = sum(p['weight'] for p in packages)
+
     metrics = SustainabilityMetrics(
-        psi=scorer.calculate_psi(shipment_data['packages']),
+        psi=scorer.calculate_psi(packages),
         res=scorer.calculate_res(
             shipment_data['origin'],
             shipment_data['destination'],
             shipment_data['transport_mode'],
-            pipeline._calculate_distance(
-                shipment_data['origin'],
-                shipment_data['destination']
-            )
+            distance
         ),
         cei=scorer.calculate_cei(
-            pipeline._calculate_distance(
-                shipment_data['origin'],
-                shipment_data['destination']
-            ),
+            distance,
             shipment_data['transport_mode'],
-            sum(p['weight'] for p in shipment_data['packages'])
+            total_weight
         ),
         rur=scorer.calculate_rur(
-            shipment_data['packages'],
+            packages,
             {'volume': 67.6, 'max_weight': 26755}  # Standard container
         ),
         eer=scorer.calculate_eer(
             shipment_data['transport_mode'],
-            pipeline._calculate_distance(
-                shipment_data['origin'],
-                shipment_data['destination']
-            ),
-            sum(p['weight'] for p in shipment_data['packages'])
+            distance,
+            total_weight
         ),
-        wrs=scorer.calculate_wrs(shipment_data['packages'])
+        wrs=scorer.calculate_wrs(packages)
     )
     
     overall_score = scorer.calculate_overall_score(metrics)
@@ -1,5 +1,8 @@
 from datetime import datetime
 import json
+import os
+
+import orjson
 from typing import List, Dict
 import pandas as pd
 import numpy as np
@@ -9,7 +12,8 @@ from sustainability_scoring import (
     LogisticsSustainabilityPipeline,
     SustainabilityScoring,
     SustainabilityPredictor,
-    analyze_sustainability
+    analyze_sustainability,
+    analyze_sustainability_batch
 )
 
 def generate_sample_data(num_samples: int = 10) -> List[Dict]:
@@ -17,41 +21,51 @@ def generate_sample_data(num_samples: int = 10) -> List[Dict]:
     
     transport_modes = ['truck', 'train', 'ship', 'air']
     material_types = ['cardboard', 'paper', 'plastic', 'metal', 'glass', 'wood']
-    
+
+    rng = np.random.default_rng()
+
+    # Every random value for the whole dataset comes from a handful of
+    # bulk Generator draws: shipment fields as (N,) arrays and package
+    # rows sampled flat across all shipments, sliced per shipment via
+    # cumulative package-count offsets
+    origin_lats = rng.uniform(25, 48, num_samples)
+    origin_longs = rng.uniform(-123, -71, num_samples)
+    dest_lats = rng.uniform(25, 48, num_samples)
+    dest_longs = rng.uniform(-123, -71, num_samples)
+    mode_indices = rng.integers(0, len(transport_modes), num_samples)
+    package_counts = rng.integers(1, 4, num_samples)  # 1-3 packages
+
+    offsets = np.concatenate(([0], np.cumsum(package_counts)))
+    total_packages = int(offsets[-1])
+    dims = rng.uniform(10, 100, (total_packages, 3))
+    weights = rng.uniform(0.5, 50, total_packages)  # kg
+    material_indices = rng.integers(0, len(material_types), total_packages)
+    recyclable = rng.random(total_packages) < 0.7
+
     samples = []
     for i in range(num_samples):
-        # Generate random coordinates within continental US
-        origin_lat = np.random.uniform(25, 48)
-        origin_long = np.random.uniform(-123, -71)
-        dest_lat = np.random.uniform(25, 48)
-        dest_long = np.random.uniform(-123, -71)
-        
-        # Generate 1-3 packages per shipment
-        num_packages = np.random.randint(1, 4)
-        packages = []
-        for j in range(num_packages):
-            length = np.random.uniform(10, 100)
-            width = np.random.uniform(10, 100)
-            height = np.random.uniform(10, 100)
-            
-            package = {
-                'package_id': f'PKG{i}-{j}',
-                'material_type': np.random.choice(material_types),
-                'weight': np.random.uniform(0.5, 50),  # kg
+        start, stop = int(offsets[i]), int(offsets[i + 1])
+
+        packages = [
+            {
+                'package_id': f'PKG{i}-{k - start}',
+                'material_type': material_types[material_indices[k]],
+                'weight': float(weights[k]),
                 'dimensions': {
-                    'length': length,
-                    'width': width,
-                    'height': height
+                    'length': float(dims[k, 0]),
+                    'width': float(dims[k, 1]),
+                    'height': float(dims[k, 2])
                 },
-                'recyclable': np.random.choice([True, False], p=[0.7, 0.3])
+                'recyclable': bool(recyclable[k])
             }
-            packages.append(package)
-        
+            for k in range(start, stop)
+        ]
+
         shipment = {
             'shipment_id': f'SHIP{i}',
-            'origin': {'lat': origin_lat, 'long': origin_long},
-            'destination': {'lat': dest_lat, 'long': dest_long},
-            'transport_mode': np.random.choice(transport_modes),
+            'origin': {'lat': float(origin_lats[i]), 'long': float(origin_longs[i])},
+            'destination': {'lat': float(dest_lats[i]), 'long': float(dest_longs[i])},
+            'transport_mode': transport_modes[mode_indices[i]],
             'packages': packages,
             'timestamp': datetime.now()
         }
@@ -67,30 +81,40 @@ def test_sustainability_scoring():
     print("\nGenerating sample shipment data...")
     sample_shipments = generate_sample_data(10)
     
-    # historical data for ML training. TODO: replace with real data
-    print("\nGenerating historical data for ML training...")
-    historical_data = generate_sample_data(100)
+    # Reuse a previously trained model when one is on disk; retraining on
+    # mock data every run costs seconds for an identical result
+    model_path = 'sustainability_model.joblib'
+    if os.path.exists(model_path):
+        print(f"\nLoading trained model from '{model_path}'...")
+        predictor.load(model_path)
+    else:
+        # historical data for ML training. TODO: replace with real data
+        print("\nGenerating historical data for ML training...")
+        historical_data = generate_sample_data(100)
 
-    # mock historical sustainability scores
-    historical_scores = np.random.uniform(50, 95, size=100)
-    
-    # Train model
-    print("\nTraining ML model...")
-    training_results = predictor.train(historical_data, historical_scores)
-    print(f"Model Training Results:")
-    print(f"Training Score: {training_results['train_score']:.2f}")
-    print(f"Test Score: {training_results['test_score']:.2f}")
+        # mock historical sustainability scores
+        historical_scores = np.random.uniform(50, 95, size=100)
+
+        # Train model
+        print("\nTraining ML model...")
+        training_results = predictor.train(historical_data, historical_scores)
+        print(f"Model Training Results:")
+        print(f"Training Score: {training_results['train_score']:.2f}")
+        print(f"Test Score: {training_results['test_score']:.2f}")
+        predictor.save(model_path)
+        print(f"Model saved to '{model_path}'")
     
-    # Analyze sample shipments
+    # Analyze sample shipments in one batch - features are stacked and the
+    # model predicts once instead of per shipment
     print("\nAnalyzing sample shipments...")
+    demo_shipments = sample_shipments[:3]  # Analyze first 3 shipments for demonstration
     results = []
-    for shipment in sample_shipments[:3]:  # Analyze first 3 shipments for demonstration
+    for shipment, analysis in zip(
+            demo_shipments,
+            analyze_sustainability_batch(pipeline, demo_shipments, predictor)):
         print(f"\nAnalyzing shipment {shipment['shipment_id']}:")
         print("----------------------------------------")
         
-        # Analyze sustainability using the trained predictor
-        analysis = analyze_sustainability(pipeline, shipment, predictor)
-        
         print("\nMetrics:")
         for metric, value in analysis['metrics'].items():
             print(f"{metric}: {value:.2f}")
@@ -127,8 +151,13 @@ def test_sustainability_scoring():
         'detailed_results': results
     }
     
-    with open('sustainability_analysis_results.json', 'w') as f:
-        json.dump(output, f, indent=2, default=str)
+    # orjson serializes NumPy scalars natively and writes bytes directly
+    with open('sustainability_analysis_results.json', 'wb') as f:
+        f.write(orjson.dumps(
+            output,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY,
+            default=str
+        ))
     
     print("\nResults saved to 'sustainability_analysis_results.json'")
 def analyze_results():
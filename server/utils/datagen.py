@@ -1,11 +1,22 @@
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-import json
+import orjson
+from collections import Counter
 from typing import List, Dict, Tuple
-import random
 from dataclasses import dataclass
 
+EARTH_RADIUS_KM = 6371
+
+
+def _haversine(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km; works on scalars and NumPy arrays alike."""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
 @dataclass
 class LocationCluster:
     """Represents a cluster of locations (e.g., major city hub)"""
@@ -15,9 +26,12 @@ class LocationCluster:
     radius: float  # radius in degrees
 
 class SyntheticDataGenerator:
-    def __init__(self, start_date: datetime = None, end_date: datetime = None):
+    def __init__(self, start_date: datetime = None, end_date: datetime = None,
+                 seed: int = None):
         self.start_date = start_date or datetime(2023, 1, 1)
         self.end_date = end_date or datetime(2024, 1, 1)
+        # Single PCG64 Generator for every draw; pass seed for reproducibility
+        self._rng = np.random.default_rng(seed)
         
         # Define common shipping hubs/clusters
         self.location_clusters = [
@@ -30,7 +44,14 @@ class SyntheticDataGenerator:
             LocationCluster("Seattle", 47.6062, -122.3321, 1.0),
             # Add more clusters as needed
         ]
-        
+
+        # SoA mirror of the clusters so sampling indexes contiguous arrays
+        # instead of boxing LocationCluster objects per draw
+        self._cluster_lats = np.array([c.lat for c in self.location_clusters])
+        self._cluster_longs = np.array([c.long for c in self.location_clusters])
+        self._cluster_radii = np.array([c.radius for c in self.location_clusters])
+
+
         # Define realistic constraints
         self.transport_modes = {
             'truck': 0.5,    # probability weights
@@ -55,38 +76,49 @@ class SyntheticDataGenerator:
             'large': {'weight': (20, 100), 'dims': (50, 120)}
         }
 
+        # Loop invariants hoisted out of the per-package/per-shipment paths
+        self._total_days = (self.end_date - self.start_date).days
+        self._size_names = list(self.size_categories)
+        self._material_names_list = list(self.material_types)
+        self._material_probs = list(self.material_types.values())
+
     def _generate_location_near_cluster(self) -> Tuple[float, float]:
         """Generate location near a random cluster"""
-        cluster = np.random.choice(self.location_clusters)
-        
+        idx = self._rng.integers(0, len(self._cluster_lats))
+
         # Generate random offset within cluster radius
-        angle = np.random.uniform(0, 2 * np.pi)
-        distance = np.random.uniform(0, cluster.radius)
-        
-        lat = cluster.lat + (distance * np.cos(angle))
-        long = cluster.long + (distance * np.sin(angle))
-        
+        angle = self._rng.uniform(0, 2 * np.pi)
+        distance = self._rng.uniform(0, self._cluster_radii[idx])
+
+        lat = self._cluster_lats[idx] + (distance * np.cos(angle))
+        long = self._cluster_longs[idx] + (distance * np.sin(angle))
+
         return lat, long
 
+    _SIZE_PROBS = [0.4, 0.4, 0.2]
+    _SIZE_PROBS_HOLIDAY = [0.3, 0.3, 0.4]
+    _HEAVY_MATERIAL_NAMES = ('metal', 'wood', 'cardboard', 'plastic')
+    _HEAVY_MATERIAL_PROBS = [0.4, 0.3, 0.2, 0.1]
+
     def _generate_package(self, timestamp: datetime) -> Dict:
         """Generate a single package with realistic properties"""
         # Select size category with seasonal variation
         month = timestamp.month
         # Increase probability of larger packages during holiday seasons
         is_holiday_season = month in [11, 12]
-        size_probs = [0.4, 0.4, 0.2] if not is_holiday_season else [0.3, 0.3, 0.4]
-        size_category = np.random.choice(list(self.size_categories.keys()), p=size_probs)
+        size_probs = self._SIZE_PROBS if not is_holiday_season else self._SIZE_PROBS_HOLIDAY
+        size_category = self._rng.choice(self._size_names, p=size_probs)
         size_constraints = self.size_categories[size_category]
         
         # Generate dimensions with some correlation
-        base_dim = np.random.uniform(*size_constraints['dims'])
-        length = base_dim * np.random.uniform(0.8, 1.2)
-        width = base_dim * np.random.uniform(0.6, 1.0)
-        height = base_dim * np.random.uniform(0.4, 0.8)
+        base_dim = self._rng.uniform(*size_constraints['dims'])
+        length = base_dim * self._rng.uniform(0.8, 1.2)
+        width = base_dim * self._rng.uniform(0.6, 1.0)
+        height = base_dim * self._rng.uniform(0.4, 0.8)
         
         # Generate correlated weight
         volume = length * width * height
-        density = np.random.uniform(0.01, 0.05)  # g/cm³
+        density = self._rng.uniform(0.01, 0.05)  # g/cm³
         weight = volume * density
         
         # Adjust weight to be within category constraints
@@ -94,31 +126,20 @@ class SyntheticDataGenerator:
         
         # Select material type with some business logic
         if weight > 50:  # Heavy items more likely to be metal/wood
-            material_weights = {'metal': 0.4, 'wood': 0.3, 'cardboard': 0.2, 'plastic': 0.1}
+            material = self._rng.choice(self._HEAVY_MATERIAL_NAMES,
+                                        p=self._HEAVY_MATERIAL_PROBS)
         else:
-            material_weights = self.material_types
-        
-        material = np.random.choice(
-            list(material_weights.keys()),
-            p=[material_weights[k] for k in material_weights.keys()]
-        )
-        
-        # Determine recyclability based on material and current trends
-        base_recyclable_prob = {
-            'cardboard': 0.95,
-            'paper': 0.90,
-            'plastic': 0.60,
-            'metal': 0.85,
-            'glass': 0.90,
-            'wood': 0.70
-        }
-        
-        # Increase recyclability probability over time
-        time_factor = (timestamp - self.start_date).days / (self.end_date - self.start_date).days
-        recyclable_prob = min(1.0, base_recyclable_prob[material] + (0.2 * time_factor))
+            material = self._rng.choice(self._material_names_list,
+                                        p=self._material_probs)
+
+        # Determine recyclability based on material and current trends;
+        # recyclability probability increases over time
+        base_prob = self._RECYCLABLE_BASE_PROB[self._MATERIAL_NAMES.index(material)]
+        time_factor = (timestamp - self.start_date).days / self._total_days
+        recyclable_prob = min(1.0, base_prob + (0.2 * time_factor))
         
         return {
-            'package_id': f'PKG{np.random.randint(10000, 99999)}',
+            'package_id': f'PKG{self._rng.integers(10000, 99999)}',
             'material_type': material,
             'weight': round(weight, 2),
             'dimensions': {
@@ -126,41 +147,56 @@ class SyntheticDataGenerator:
                 'width': round(width, 2),
                 'height': round(height, 2)
             },
-            'recyclable': np.random.random() < recyclable_prob
+            'recyclable': self._rng.random() < recyclable_prob
         }
 
-    def _select_transport_mode(self, distance: float, weight: float, 
+    _MODE_NAMES = ('truck', 'train', 'ship', 'air')
+    # Probability rows per distance bucket: <300 km, <1000 km, long haul
+    _MODE_PROBS = np.array([
+        [0.8, 0.15, 0.0, 0.05],
+        [0.4, 0.4, 0.1, 0.1],
+        [0.2, 0.3, 0.4, 0.1],
+    ])
+    _MODE_CDFS = np.cumsum(_MODE_PROBS, axis=1)
+
+    def _select_transport_mode(self, distance: float, weight: float,
                              timestamp: datetime) -> str:
         """Select appropriate transport mode based on distance, weight, and time"""
-        if distance < 300:  # Short distance
-            probs = {'truck': 0.8, 'train': 0.15, 'ship': 0.0, 'air': 0.05}
-        elif distance < 1000:  # Medium distance
-            probs = {'truck': 0.4, 'train': 0.4, 'ship': 0.1, 'air': 0.1}
-        else:  # Long distance
-            probs = {'truck': 0.2, 'train': 0.3, 'ship': 0.4, 'air': 0.1}
-        
-        # Adjust for weight
-        if weight > 1000:  # Heavy shipment
-            probs['air'] = 0.05
-            probs['ship'] *= 1.5
-        
-        # Adjust for urgency (simplified: assume end of month/quarter is more urgent)
-        if timestamp.day > 25 or timestamp.month in [3, 6, 9, 12]:
-            probs['air'] *= 1.5
-            probs['truck'] *= 1.2
-        
-        # Normalize probabilities
-        total = sum(probs.values())
-        probs = {k: v/total for k, v in probs.items()}
-        
-        return np.random.choice(list(probs.keys()), p=list(probs.values()))
+        return self._MODE_NAMES[
+            self._select_transport_mode_idx(distance, weight, timestamp)]
+
+    def _select_transport_mode_idx(self, distance: float, weight: float,
+                                   timestamp: datetime) -> int:
+        """Like _select_transport_mode, but returns the _MODE_NAMES index"""
+        bucket = 0 if distance < 300 else 1 if distance < 1000 else 2
+
+        heavy = weight > 1000
+        # Urgency (simplified: assume end of month/quarter is more urgent)
+        urgent = timestamp.day > 25 or timestamp.month in (3, 6, 9, 12)
+
+        if not heavy and not urgent:
+            # Common case: sample straight off the precomputed CDF row
+            cdf = self._MODE_CDFS[bucket]
+        else:
+            probs = self._MODE_PROBS[bucket].copy()
+            if heavy:
+                probs[3] = 0.05
+                probs[2] *= 1.5
+            if urgent:
+                probs[3] *= 1.5
+                probs[0] *= 1.2
+            cdf = np.cumsum(probs)
+
+        # Scaling u by the CDF total stands in for re-normalizing the row
+        u = self._rng.random() * cdf[-1]
+        return int(np.searchsorted(cdf, u, side='right'))
 
     def generate_shipment(self, timestamp: datetime = None) -> Dict:
         """Generate a single shipment with realistic properties"""
         if timestamp is None:
-            timestamp = np.random.choice(
-                pd.date_range(self.start_date, self.end_date, freq='H')
-            ).to_pydatetime()
+            timestamp = pd.Timestamp(self._rng.choice(
+                pd.date_range(self.start_date, self.end_date, freq='H').values
+            )).to_pydatetime()
         
         # Generate origin and destination
         origin_lat, origin_long = self._generate_location_near_cluster()
@@ -168,23 +204,21 @@ class SyntheticDataGenerator:
         
         # Generate 1-5 packages, with more packages during peak seasons
         is_peak_season = timestamp.month in [11, 12]  # Holiday season
-        num_packages = np.random.randint(1, 6 if is_peak_season else 4)
+        num_packages = self._rng.integers(1, 6 if is_peak_season else 4)
         
         packages = [self._generate_package(timestamp) for _ in range(num_packages)]
         
         # Calculate total weight for transport mode selection
         total_weight = sum(p['weight'] for p in packages)
         
-        # Calculate approximate distance
-        distance = np.sqrt(
-            (dest_lat - origin_lat)**2 + (dest_long - origin_long)**2
-        ) * 111  # Convert to km (approximate)
+        # Calculate great-circle distance
+        distance = _haversine(origin_lat, origin_long, dest_lat, dest_long)
         
         # Select transport mode based on characteristics
         transport_mode = self._select_transport_mode(distance, total_weight, timestamp)
         
         return {
-            'shipment_id': f'SHIP{np.random.randint(100000, 999999)}',
+            'shipment_id': f'SHIP{self._rng.integers(100000, 999999)}',
             'timestamp': timestamp.isoformat(),
             'origin': {'lat': origin_lat, 'long': origin_long},
             'destination': {'lat': dest_lat, 'long': dest_long},
@@ -192,61 +226,174 @@ class SyntheticDataGenerator:
             'packages': packages
         }
 
+    def _bulk_locations(self, rng: np.random.Generator, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Draw n locations near random clusters in one vectorized pass"""
+        idx = rng.integers(0, len(self._cluster_lats), n)
+        angles = rng.uniform(0, 2 * np.pi, n)
+        dists = rng.random(n) * self._cluster_radii[idx]
+        return (self._cluster_lats[idx] + dists * np.cos(angles),
+                self._cluster_longs[idx] + dists * np.sin(angles))
+
+    # Material axis shared by both probability tables below
+    _MATERIAL_NAMES = ('cardboard', 'paper', 'plastic', 'metal', 'glass', 'wood')
+    _MATERIAL_CDF = np.cumsum([0.4, 0.2, 0.2, 0.1, 0.05, 0.05])
+    _MATERIAL_CDF_HEAVY = np.cumsum([0.2, 0.0, 0.1, 0.4, 0.0, 0.3])
+    _RECYCLABLE_BASE_PROB = np.array([0.95, 0.90, 0.60, 0.85, 0.90, 0.70])
+    # Per-package score adjustment along the same material axis
+    _MATERIAL_SCORE_BONUS = np.array([1.0, 1.0, -1.0, 0.0, 0.0, 0.0])
+    # Score adjustment per transport mode, aligned with _MODE_NAMES
+    _TRANSPORT_FACTORS = np.array([-5.0, 5.0, 0.0, -15.0])
+    _SIZE_CDF = np.cumsum([0.4, 0.4, 0.2])
+    _SIZE_CDF_HOLIDAY = np.cumsum([0.3, 0.3, 0.4])
+
+    def _bulk_packages(self, rng: np.random.Generator, months: np.ndarray,
+                       time_factors: np.ndarray) -> Dict[str, np.ndarray]:
+        """Generate flat package attribute arrays for one package per input row.
+
+        months/time_factors are already repeated per package; every column of
+        the returned dict has the same length.
+        """
+        n = len(months)
+        holiday = (months == 11) | (months == 12)
+
+        # Size category, then correlated dimensions and weight
+        u = rng.random(n)
+        size_idx = np.where(holiday,
+                            np.searchsorted(self._SIZE_CDF_HOLIDAY, u, side='right'),
+                            np.searchsorted(self._SIZE_CDF, u, side='right'))
+        dim_lo = np.array([self.size_categories[k]['dims'][0] for k in self.size_categories])
+        dim_hi = np.array([self.size_categories[k]['dims'][1] for k in self.size_categories])
+        weight_lo = np.array([self.size_categories[k]['weight'][0] for k in self.size_categories])
+        weight_hi = np.array([self.size_categories[k]['weight'][1] for k in self.size_categories])
+
+        base_dim = rng.uniform(dim_lo[size_idx], dim_hi[size_idx])
+        length = base_dim * rng.uniform(0.8, 1.2, n)
+        width = base_dim * rng.uniform(0.6, 1.0, n)
+        height = base_dim * rng.uniform(0.4, 0.8, n)
+        volume = length * width * height
+        weight = np.clip(volume * rng.uniform(0.01, 0.05, n),
+                         weight_lo[size_idx], weight_hi[size_idx])
+
+        # Heavy items draw from the metal/wood-biased table
+        u = rng.random(n)
+        material_idx = np.where(weight > 50,
+                                np.searchsorted(self._MATERIAL_CDF_HEAVY, u, side='right'),
+                                np.searchsorted(self._MATERIAL_CDF, u, side='right'))
+        material_idx = np.minimum(material_idx, len(self._MATERIAL_NAMES) - 1)
+
+        recyclable_prob = np.minimum(
+            1.0, self._RECYCLABLE_BASE_PROB[material_idx] + 0.2 * time_factors)
+        recyclable = rng.random(n) < recyclable_prob
+
+        return {
+            'length': length,
+            'width': width,
+            'height': height,
+            'weight': weight,
+            'material_idx': material_idx,
+            'recyclable': recyclable,
+        }
+
+    def _sample_timestamps(self, rng: np.random.Generator, n: int) -> List[datetime]:
+        """Sample n timestamps with realistic patterns, vectorized.
+
+        More shipments during business hours and weekdays: draw uniform
+        offsets over the whole date range, then keep weekday business hours
+        unconditionally and weekends with 30% probability. Oversample to
+        cover the rejection rate instead of walking the range hour by hour.
+        """
+        total_sec = int((self.end_date - self.start_date).total_seconds())
+        start = np.datetime64(self.start_date)
+
+        kept = []
+        remaining = n
+        while remaining > 0:
+            raw = rng.integers(0, total_sec, max(remaining * 3, 64))
+            ts = start + raw.astype('timedelta64[s]')
+            hour = ts.astype('datetime64[h]').astype(np.int64) % 24
+            # Unix day 0 (1970-01-01) was a Thursday
+            weekday = (ts.astype('datetime64[D]').astype(np.int64) + 3) % 7
+            business = (weekday < 5) & (hour >= 8) & (hour <= 18)
+            weekend = (weekday >= 5) & (rng.random(len(ts)) < 0.3)
+            accepted = ts[business | weekend]
+            kept.append(accepted[:remaining])
+            remaining -= len(accepted)
+
+        timestamps = np.sort(np.concatenate(kept))
+        return timestamps.astype('datetime64[s]').tolist()
+
     def generate_historical_dataset(self, num_shipments: int) -> Tuple[List[Dict], List[float]]:
         """Generate historical dataset with shipments and corresponding sustainability scores"""
+        rng = self._rng
+
+        timestamps = self._sample_timestamps(rng, num_shipments)
+
+        # Bulk-draw everything with one RNG call per field instead of
+        # num_shipments scalar calls inside generate_shipment
+        origin_lat, origin_long = self._bulk_locations(rng, num_shipments)
+        dest_lat, dest_long = self._bulk_locations(rng, num_shipments)
+        distances = _haversine(origin_lat, origin_long, dest_lat, dest_long)
+
+        months = np.fromiter((t.month for t in timestamps), dtype=np.int64,
+                             count=num_shipments)
+        time_factors = np.fromiter(
+            ((t - self.start_date).days / self._total_days for t in timestamps),
+            dtype=np.float64, count=num_shipments)
+
+        # More packages during peak seasons
+        is_peak = (months == 11) | (months == 12)
+        num_packages = rng.integers(1, np.where(is_peak, 6, 4))
+        offsets = np.concatenate(([0], np.cumsum(num_packages)))
+
+        pkg = self._bulk_packages(rng,
+                                  np.repeat(months, num_packages),
+                                  np.repeat(time_factors, num_packages))
+        total_weights = np.add.reduceat(pkg['weight'], offsets[:-1])
+
+        # Draw all IDs up front rather than one scalar randint per object
+        pkg_ids = rng.integers(10000, 99999, offsets[-1])
+        ship_ids = rng.integers(100000, 999999, num_shipments)
+
         shipments = []
-        scores = []
-        
-        # Generate timestamps with realistic patterns
-        # More shipments during business hours and weekdays
-        timestamps = []
-        current = self.start_date
-        while len(timestamps) < num_shipments:
-            if current.weekday() < 5:  # Weekday
-                if 8 <= current.hour <= 18:  # Business hours
-                    timestamps.append(current)
-            elif np.random.random() < 0.3:  # Weekend with lower probability
-                timestamps.append(current)
-            current += timedelta(hours=1)
-            if current > self.end_date:
-                current = self.start_date
-        
-        timestamps = np.random.choice(timestamps, num_shipments, replace=False)
-        timestamps.sort()
-        
-        for timestamp in timestamps:
-            shipment = self.generate_shipment(timestamp)
-            shipments.append(shipment)
-            
-            # Generate realistic sustainability score based on shipment characteristics
-            base_score = 70  # Base sustainability score
-            
-            # Adjust score based on transport mode
-            transport_factors = {
-                'truck': -5,
-                'train': +5,
-                'ship': 0,
-                'air': -15
-            }
-            score = base_score + transport_factors[shipment['transport_mode']]
-            
-            # Adjust for package characteristics
-            for package in shipment['packages']:
-                if package['recyclable']:
-                    score += 2
-                if package['material_type'] in ['cardboard', 'paper']:
-                    score += 1
-                elif package['material_type'] in ['plastic']:
-                    score -= 1
-            
-            # Add some random variation
-            score += np.random.normal(0, 3)
-            
-            # Ensure score is within bounds
-            score = np.clip(score, 0, 100)
-            scores.append(score)
-        
-        return shipments, scores
+        modes = []
+        for i, timestamp in enumerate(timestamps):
+            packages = [
+                {
+                    'package_id': f'PKG{pkg_ids[k]}',
+                    'material_type': self._MATERIAL_NAMES[pkg['material_idx'][k]],
+                    'weight': round(float(pkg['weight'][k]), 2),
+                    'dimensions': {
+                        'length': round(float(pkg['length'][k]), 2),
+                        'width': round(float(pkg['width'][k]), 2),
+                        'height': round(float(pkg['height'][k]), 2)
+                    },
+                    'recyclable': bool(pkg['recyclable'][k])
+                }
+                for k in range(offsets[i], offsets[i + 1])
+            ]
+            mode_idx = self._select_transport_mode_idx(
+                float(distances[i]), float(total_weights[i]), timestamp)
+            modes.append(mode_idx)
+            shipments.append({
+                'shipment_id': f'SHIP{ship_ids[i]}',
+                'timestamp': timestamp.isoformat(),
+                'origin': {'lat': float(origin_lat[i]), 'long': float(origin_long[i])},
+                'destination': {'lat': float(dest_lat[i]), 'long': float(dest_long[i])},
+                'transport_mode': self._MODE_NAMES[mode_idx],
+                'packages': packages
+            })
+
+        # Generate realistic sustainability scores from shipment characteristics:
+        # base 70, adjusted per transport mode and per package (recyclable +2,
+        # cardboard/paper +1, plastic -1), plus Gaussian noise, clipped to [0, 100]
+        mode_factor = self._TRANSPORT_FACTORS[np.array(modes)]
+        pkg_bonus = (2.0 * pkg['recyclable']
+                     + self._MATERIAL_SCORE_BONUS[pkg['material_idx']])
+        scores = 70.0 + mode_factor + np.add.reduceat(pkg_bonus, offsets[:-1])
+        scores += rng.normal(0, 3, num_shipments)
+        scores = np.clip(scores, 0, 100)
+
+        return shipments, scores.tolist()
 
 def save_synthetic_data(num_shipments: int = 1000, output_file: str = 'synthetic_data.json'):
     """Generate and save synthetic data to file"""
@@ -268,8 +415,9 @@ def save_synthetic_data(num_shipments: int = 1000, output_file: str = 'synthetic
         }
     }
     
-    with open(output_file, 'w') as f:
-        json.dump(output, f, indent=2)
+    with open(output_file, 'wb') as f:
+        f.write(orjson.dumps(
+            output, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
     
     print(f"Generated {num_shipments} synthetic shipments and saved to {output_file}")
     
@@ -278,11 +426,10 @@ def save_synthetic_data(num_shipments: int = 1000, output_file: str = 'synthetic
     print(f"Average sustainability score: {np.mean(scores):.2f}")
     print(f"Score range: {min(scores):.2f} - {max(scores):.2f}")
     
-    transport_modes = [s['transport_mode'] for s in shipments]
+    mode_counts = Counter(s['transport_mode'] for s in shipments)
     print("\nTransport mode distribution:")
-    for mode in set(transport_modes):
-        count = transport_modes.count(mode)
-        print(f"{mode}: {count/len(transport_modes)*100:.1f}%")
+    for mode, count in mode_counts.items():
+        print(f"{mode}: {count/num_shipments*100:.1f}%")
 
 if __name__ == "__main__":
     save_synthetic_data(num_shipments=1000)
\ No newline at end of file
@@ -1,14 +1,28 @@
 import requests
-import json
+import orjson
 import time
+from pathlib import Path
 
-with open('/home/mayankch283/carboncare-logistics-agent/server/synthetic_data_1.json', 'r') as f:
-    data = json.load(f)
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-# Train the model
-response = requests.post('http://localhost:5000/api/v1/sustainability/train', json={
-    'historical_data': data['data']['shipments'],
-    'historical_scores': data['data']['sustainability_scores']
+# One session so both calls reuse the same keep-alive connection
+session = requests.Session()
+session.mount('http://', HTTPAdapter(
+    pool_connections=4, pool_maxsize=4,
+    max_retries=Retry(total=3, backoff_factor=0.3)))
+
+# Dataset produced by utils/datagen.py, written next to the server code
+DATA_FILE = Path(__file__).resolve().parent.parent / 'synthetic_data.json'
+data = orjson.loads(DATA_FILE.read_bytes())
+
+# Train the model; /train expects the same data.shipments/
+# data.sustainability_scores layout datagen writes
+response = session.post('http://localhost:5000/api/v1/sustainability/train', json={
+    'data': {
+        'shipments': data['data']['shipments'],
+        'sustainability_scores': data['data']['sustainability_scores']
+    }
 })
 
 time.sleep(5)
@@ -34,10 +48,10 @@ batch_payload = {
 }
 
 # Send a POST request to the batch-analyze endpoint
-response = requests.post('http://localhost:5000/api/v1/sustainability/batch-analyze', json=batch_payload)
+response = session.post('http://localhost:5000/api/v1/sustainability/batch-analyze', json=batch_payload)
 
 # Print the response
 print("Status Code:", response.status_code)
 print("Response JSON:")
-print(json.dumps(response.json(), indent=1))
+print(orjson.dumps(response.json(), option=orjson.OPT_INDENT_2).decode())
         
\ No newline at end of file